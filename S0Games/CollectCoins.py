@@ -23,6 +23,11 @@ light_gray = (120,120,120)
 dark_gray = (40,40,40)
 silver = (192,192,192)
 
+# constant texts are rendered once; the score text only when the score changes
+game_over_text = gameover_font.render("Game Over",True,light_gray)
+restart_text = normal_font.render("Press Enter To Restart",True,light_gray)
+score_cache = (None, None)
+
 # Player Coordinates
 player_width = 50
 player_height = 50
@@ -48,6 +53,36 @@ coin_speed_increase = 0.4
 # Frame
 clock = pygame.time.Clock()
 
+
+def rects_overlap(ax, ay, aw, ah, bx, by, bw, bh):
+    return ax < bx + bw and ax + aw > bx and ay < by + bh and ay + ah > by
+
+
+# physics for one frame, kept apart from drawing so the loop body stays small
+def step(player_x, obstacle_x, obstacle_y, obstacle_speed, coin_x, coin_y, coin_speed, score):
+    obstacle_y += obstacle_speed
+    if obstacle_y > screen_height:
+        obstacle_x = random.randint(0,screen_width- obstacle_width)
+        obstacle_y = -obstacle_height
+        obstacle_speed += obstacle_speed_increase
+
+    coin_y += coin_speed
+    if coin_y > screen_height:
+        coin_x = random.randint(0,screen_width - coin_radius)
+        coin_y = -coin_radius
+        coin_speed += coin_speed_increase
+
+    hit = rects_overlap(player_x, player_y, player_width, player_height,
+                        obstacle_x, obstacle_y, obstacle_width, obstacle_height)
+    if rects_overlap(player_x, player_y, player_width, player_height,
+                     coin_x - coin_radius, coin_y - coin_radius, 2 * coin_radius, 2 * coin_radius):
+        score += 10
+        coin_x = random.randint(0,screen_width - coin_radius)
+        coin_y = -coin_radius
+        coin_speed += coin_speed_increase
+    return obstacle_x, obstacle_y, obstacle_speed, coin_x, coin_y, coin_speed, score, hit
+
+
 # running 
 runninng = True
 game_over = False
@@ -72,54 +107,34 @@ while runninng:
                 score = 0
     if not game_over:
         keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT] and player_x>0:
-            player_x -= player_speed
-        if keys[pygame.K_RIGHT] and player_x< screen_width - player_width:
-            player_x += player_speed
+        dx = (int(keys[pygame.K_RIGHT]) - int(keys[pygame.K_LEFT])) * player_speed
+        player_x = min(max(player_x + dx, 0), screen_width - player_width)
         
-        obstacle_y += obstacle_speed
-        if obstacle_y > screen_height:
-            obstacle_x = random.randint(0,screen_width- obstacle_width)
-            obstacle_y = -obstacle_height
-            obstacle_speed += obstacle_speed_increase
-            
-        coin_y += coin_speed
-        if coin_y > screen_height:
-            coin_x = random.randint(0,screen_width - coin_radius)
-            coin_y = -coin_radius
-            coin_speed += coin_speed_increase
-        
-        if player_x < obstacle_x + obstacle_width and player_x + player_width> obstacle_x \
-            and player_y < obstacle_y + obstacle_height and player_y + player_height> obstacle_height:
-                game_over = True
-        if player_x < coin_x +coin_radius and player_x + player_width> coin_x - coin_radius \
-            and player_y < coin_y + coin_radius and player_y + player_height > coin_y - coin_radius:
-                score += 10
-                coin_x = random.randint(0,screen_width - coin_radius)
-                coin_y = -coin_radius
-                coin_speed += coin_speed_increase
+        (obstacle_x, obstacle_y, obstacle_speed,
+         coin_x, coin_y, coin_speed, score, game_over) = step(
+            player_x, obstacle_x, obstacle_y, obstacle_speed, coin_x, coin_y, coin_speed, score)
     if dark_mode:
         screen.fill(black)    
     else:
         screen.fill(white)
     
+    if score_cache[0] != score:
+        score_cache = (score, normal_font.render(f"Your Score{score}",True,light_gray))
+    score_text = score_cache[1]
+
     if game_over:
-        game_over_text = gameover_font.render("Game Over",True,light_gray)
         screen.blit(game_over_text,(screen_width//2 - game_over_text.get_width()//2,\
                                     screen_height//2 - game_over_text.get_height()//2))
-        
-        restart_text = normal_font.render("Press Enter To Restart",True,light_gray)
+
         screen.blit(restart_text,(screen_width//2 - restart_text.get_width()//2,\
                                     screen_height//2 - restart_text.get_height()//2 +50))
-        
-        score_text = normal_font.render(f"Your Score{score}",True,light_gray)
+
         screen.blit(score_text,(screen_width//2 - score_text.get_width()//2,\
                                     screen_height//2 - score_text.get_height()//2 + 100))
     else:
         pygame.draw.rect(screen,silver,(player_x,player_y,player_width,player_height))
         pygame.draw.rect(screen,red,(obstacle_x,obstacle_y,obstacle_width,obstacle_height))
         pygame.draw.circle(screen,yellow,(coin_x,coin_y),coin_radius)
-        score_text = normal_font.render(f"Your Score{score}",True,light_gray)
         screen.blit(score_text,(10,10))
 
         
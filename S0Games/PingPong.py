@@ -43,14 +43,21 @@ screen = pygame.display.set_mode((width,height))
 pygame.display.set_caption("Ping Pong")
 
 
+score_font = pygame.font.Font(None,36)
+center_text = score_font.render(".",True,white)
+# (score1, score2) the surfaces were rendered for, left surface, right surface
+score_surfaces = (None, None, None)
+
 def draw_score():
-    font = pygame.font.Font(None,36)
-    center = font.render(".",True,white)
-    score1_text = font.render(f"Score {player1}:{score1}",True,green)
-    score2_text = font.render(f"Score {player2}:{score2}",True,green)
+    global score_surfaces
+    if score_surfaces[0] != (score1,score2):
+        score_surfaces = ((score1,score2),
+                          score_font.render(f"Score {player1}:{score1}",True,green),
+                          score_font.render(f"Score {player2}:{score2}",True,green))
+    _, score1_text, score2_text = score_surfaces
     screen.blit(score1_text,(10,10))
     screen.blit(score2_text,(width-score2_text.get_width()- 10,10))
-    screen.blit(center,(width//2,height//2))
+    screen.blit(center_text,(width//2,height//2))
 
 #  barkhord toop ba paddle
 def check_collision(ball,paddle):
@@ -91,12 +98,7 @@ while running:
                 paddle2_dy = 0
         
     keys = pygame.key.get_pressed()
-    if keys[pygame.K_w]:
-        paddle1_dy = -paddlle_speed
-    elif keys[pygame.K_s]:
-        paddle1_dy = paddlle_speed
-    else:
-        paddle1_dy = 0
+    paddle1_dy = (int(keys[pygame.K_s]) - int(keys[pygame.K_w])) * paddlle_speed
     
     if ball_in_motion:
         ball.x += ball_dx
@@ -124,17 +126,9 @@ while running:
             ball_dx = reset_ball_position('left')
             ball_in_motion = False       
             
-    paddle1.y += paddle1_dy
-    paddle2.y += paddle2_dy
-
-    if paddle1.top <=0 :
-        paddle1.top = 0
-    if paddle1.bottom >= height:
-        paddle1.bottom = height
-    if paddle2.top <=0 :
-        paddle2.top = 0
-    if paddle2.bottom >= height:
-        paddle2.bottom = height
+    # move and clamp the paddles to the screen in one step
+    paddle1.y = min(max(paddle1.y + paddle1_dy, 0), height - paddle_height)
+    paddle2.y = min(max(paddle2.y + paddle2_dy, 0), height - paddle_height)
     
     screen.fill(black)
 
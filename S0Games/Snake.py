@@ -1,5 +1,6 @@
 from tkinter import *
 from random import randint
+from collections import Counter, deque
 import os
 import sys
 
@@ -8,11 +9,13 @@ class Snake:
     # BODY_SIZE = 2
     def __init__(self):
         self.body_size = BODY_SIZE
-        self.squares = []
-        self.coordinates = []
+        self.squares = deque()
+        self.coordinates = deque()
 
         for i in range(0, BODY_SIZE):
-            self.coordinates.append([0, 0])
+            self.coordinates.append((0, 0))
+        # how many body parts sit on each cell, for O(1) self-collision checks
+        self.occupied = Counter(self.coordinates)
 
         for x, y in self.coordinates:
             square = canvas.create_rectangle(x, y, x + GAME_SPACE, y + GAME_SPACE, fill=SNAKE_COLOR, tag="snake")
@@ -39,9 +42,10 @@ def next_turn(snake, food):
     elif direction == "right":
         x += GAME_SPACE
 
-    snake.coordinates.insert(0, [x, y])
+    snake.coordinates.appendleft((x, y))
+    snake.occupied[(x, y)] += 1
     square = canvas.create_rectangle(x, y, x + GAME_SPACE, y + GAME_SPACE, fill=SNAKE_COLOR)
-    snake.squares.insert(0, square)
+    snake.squares.appendleft(square)
 
     if x == food.coordinates[0] and y == food.coordinates[1]:
         global score
@@ -50,9 +54,11 @@ def next_turn(snake, food):
         canvas.delete("food")
         food = Food()
     else:
-        del snake.coordinates[-1]
-        canvas.delete(snake.squares[-1])
-        del snake.squares[-1]
+        tail = snake.coordinates.pop()
+        snake.occupied[tail] -= 1
+        if not snake.occupied[tail]:
+            del snake.occupied[tail]
+        canvas.delete(snake.squares.pop())
 
     if check_game_over(snake):
         game_over()
@@ -70,10 +76,8 @@ def check_game_over(snake):
     if y < 0 or y+GAME_SPACE > GAME_HEIGHT:
         return True
 
-    for sq in snake.coordinates[1:]:
-        if x == sq[0] and y == sq[1]:
-            return True
-    return False
+    # the head itself is counted once, anything more is the body
+    return snake.occupied[(x, y)] > 1
 
 
 def game_over():
@@ -5,8 +5,12 @@ board = list(range(1, 10))
 # board = [1, 2, 3, 4, 5, 6, 7, "O", "X"]
 
 winners = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
+# each winning line as a 9-bit mask, bit i set for board[i]
+win_masks = tuple(sum(1 << i for i in tup) for tup in winners)
 cmove = ((5,), (1, 3, 7, 9), (2, 4, 6, 8))
 player, computer = "X", "O"
+# cells taken by each side, kept in sync with board by make_move
+masks = {player: 0, computer: 0}
 
 
 def print_board():
@@ -32,30 +36,23 @@ def can_move(brd, mve):
 
 def make_move(brd, plyr, mve, undo=False):
     if can_move(brd, mve):
-        board[mve - 1] = plyr
-        win = is_winner(brd, plyr)
-        if undo:
-            board[mve - 1] = mve
+        bit = 1 << (mve - 1)
+        win = is_winner(masks[plyr] | bit)
+        # with undo the move is only tried on the mask, the board is left alone
+        if not undo:
+            brd[mve - 1] = plyr
+            masks[plyr] |= bit
         return True, win
     return False, False
 
 
 
-def is_winner(brd, plyr):
-    win = True
-    for tup in winners:
-        win = True
-        for j in tup:
-            if brd[j] != plyr:
-                win = False
-                break
-        if win:
-            break
-    return win
+def is_winner(mask):
+    return any(mask & w == w for w in win_masks)
 
 
 def has_empty_spaces():
-    return board.count("X") + board.count("O") != 9
+    return any(isinstance(cell, int) for cell in board)
 
 
 def cmp_move():
@@ -1,23 +1,53 @@
 import sqlite3
+import sys
+import os
+import base64
 from getpass import getpass
 import secrets
 import string
 from cryptography.fernet import Fernet 
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives import hashes
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
 
 # encryption_key = Fernet.generate_key()
 # print(encryption_key)
 encryption_key = b'uZ0Ckjs6vtswKRY6BxM8ET0PyhSs8C2Spo37PCJ17ic='
-cipher_suite = Fernet(encryption_key)
+# Fernet already splits these 32 bytes into its HMAC and AES keys, so AES-GCM gets its own key derived from them
+aesgcm_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None,
+                  info=b"password-manager aes-256-gcm").derive(base64.urlsafe_b64decode(encryption_key))
+# passwords are stored as nonce(12) + AES-GCM ciphertext in a BLOB
+cipher_suite = AESGCM(aesgcm_key)
+# only used to read rows written before the switch from Fernet
+legacy_cipher = Fernet(encryption_key)
+NONCE_SIZE = 12
+# account passwords are only ever verified, so they are hashed, not encrypted
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64*1024, parallelism=1)
+
+# the bound methods are default arguments so each call reads locals, not module globals
+def encrypt_password(password, _encrypt=cipher_suite.encrypt, _urandom=os.urandom):
+    nonce = _urandom(NONCE_SIZE)
+    return nonce + _encrypt(nonce, password.encode(), None)
+
+def decrypt_password(stored, _decrypt=cipher_suite.decrypt, _legacy_decrypt=legacy_cipher.decrypt):
+    if isinstance(stored, str):
+        return _legacy_decrypt(stored.encode()).decode()
+    return _decrypt(stored[:NONCE_SIZE], stored[NONCE_SIZE:], None).decode()
 
 conn = sqlite3.connect('password_manager.db')
 cursor = conn.cursor()
+# WAL makes each commit an append instead of a journal rewrite + fsync
+cursor.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; "
+                     "PRAGMA temp_store=MEMORY; PRAGMA cache_size=-20000;")
 
 cursor.execute ('''
     CREATE TABLE IF NOT EXISTS passwords(
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         website TEXT NOT NULL,
         username TEXT NOT NULL,
-        password TEXT NOT NULL
+        password BLOB NOT NULL
     )
 ''')
 conn.commit()
@@ -25,19 +55,29 @@ conn.commit()
 cursor.execute ('''
     CREATE TABLE IF NOT EXISTS users(
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT NOT NULL,
+        username TEXT NOT NULL UNIQUE,
         password TEXT NOT NULL
     )
 ''')
 conn.commit()
 
+# login() looks users up by name on every menu action. Fresh databases already get an index
+# from the UNIQUE constraint; older ones may hold duplicate names, so this one is not unique
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
+cursor.execute("CREATE INDEX IF NOT EXISTS idx_passwords_website ON passwords(website)")
+conn.commit()
+
 def register_user():
     username = input("Enter your username: ")
     password = getpass("Enter your password: ")
-    encrypted_password = cipher_suite.encrypt(password.encode()).decode()
+    hashed_password = password_hasher.hash(password)
     
-    conn.execute("INSERT INTO users (username,password) VALUES (?,?)",
-                 (username,encrypted_password))
+    try:
+        conn.execute("INSERT INTO users (username,password) VALUES (?,?)",
+                     (username,hashed_password))
+    except sqlite3.IntegrityError:
+        print("This username is already taken!")
+        return
     conn.commit()
     print("User registration successfull!")
 
@@ -50,16 +90,29 @@ def login():
     user = cursor.fetchone()
     if user:
         stored_password = user[2]
-        decrypted_password = cipher_suite.decrypt(stored_password.encode()).decode()
-        if password == decrypted_password:
+        if isinstance(stored_password, str) and stored_password.startswith("$argon2"):
+            try:
+                valid = password_hasher.verify(stored_password, password)
+            except VerifyMismatchError:
+                valid = False
+        else:
+            # accounts from before hashing still hold a ciphertext, upgrade them now
+            valid = decrypt_password(stored_password) == password
+            if valid:
+                cursor.execute("UPDATE users SET password=? WHERE username=?",
+                               (password_hasher.hash(password),username))
+                conn.commit()
+        if valid:
             print("Login successful!")
             return True
     print("login failed")
     return False
 
+PASSWORD_ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*()_+?"
+
 def generate_strong_password(length = 12):
-    characters = string.ascii_letters + string.digits + "!@#$%^&*()_+?"
-    strong_password = ''.join(secrets.choice(characters)for _ in range(length))
+    # one choices() call draws all characters from the OS CSPRNG, over the full alphabet
+    strong_password = ''.join(secrets.SystemRandom().choices(PASSWORD_ALPHABET, k=length))
     return strong_password
 
     
@@ -70,11 +123,17 @@ def change_password():
     if not new_password:
         new_password = generate_strong_password()
         print(f"your new password is {new_password}")
-    encrypted_password = cipher_suite.encrypt(new_password.encode()).decode()
-    cursor.execute("UPDATE users SET password=? WHERE username=?",(encrypted_password,username))
+    hashed_password = password_hasher.hash(new_password)
+    cursor.execute("UPDATE users SET password=? WHERE username=?",(hashed_password,username))
     conn.commit()
     print("Your new password changed successfully!")
 
+# items is an iterable of (website, password); all rows go in one transaction
+def add_passwords_bulk(items):
+    rows = [(website,username,encrypt_password(password)) for website, password in items]
+    with conn:
+        conn.executemany("INSERT INTO passwords (website,username,password) VALUES (?,?,?)", rows)
+
 def add_password():
     if not login():
         return
@@ -85,23 +144,17 @@ def add_password():
         print(f"Password: {password}")
     else :
         password = getpass("Password: ")
-    encrypted_password = cipher_suite.encrypt(password.encode()).decode()
-    conn.execute("INSERT INTO passwords (website,username,password) VALUES (?,?,?)",
-                (website,username,encrypted_password))
-    conn.commit()
+    add_passwords_bulk([(website,password)])
     print("password added successfully!")
 
 def view_password():
     if not login():
         return
-    cursor.execute("SELECT * FROM passwords")
-    passwords = cursor.fetchall()
-    for password in passwords:
-        website = password[1]  
-        username = password[2]
-        encrypted_password = password[3] 
-        decrypted_password = cipher_suite.decrypt(encrypted_password.encode()).decode()
-        print(f"ID:{password[0]} Website:{website} Username:{username} Password:{decrypted_password}")
+    rows = cursor.execute("SELECT id,website,username,password FROM passwords")
+    lines = [f"ID:{pw_id} Website:{website} Username:{user} Password:{decrypt_password(encrypted)}"
+             for pw_id, website, user, encrypted in rows]
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
 
 def delete_password():
     if not login():
@@ -6,6 +6,9 @@ import shutil
 import os, sys, subprocess
 import easygui
 
+# 1 MiB chunks for any copy that can't use the kernel fast path
+COPY_BUFSIZE = 1024 * 1024
+
 
 def file_open_box():
     path = easygui.fileopenbox()
@@ -31,13 +34,37 @@ def open_file():
         messagebox.showinfo("error", "couldn't open file!")
 
 
+def fast_copy(source, destination):
+    if os.path.isdir(destination):
+        destination = os.path.join(destination, os.path.basename(source))
+    # check before opening, "wb" would truncate the source if it is the same file
+    if os.path.exists(destination) and os.path.samefile(source, destination):
+        raise shutil.SameFileError(f"{source!r} and {destination!r} are the same file")
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        size = os.fstat(src.fileno()).st_size
+        try:
+            # copy inside the kernel (or reflink) without passing data through python
+            copied = 0
+            while copied < size:
+                n = os.copy_file_range(src.fileno(), dst.fileno(), size - copied)
+                if n == 0:
+                    break
+                copied += n
+        except (OSError, AttributeError):
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+            shutil.copyfileobj(src, dst, COPY_BUFSIZE)
+    shutil.copymode(source, destination)
+
+
 def copy_file():
     source = file_open_box()
     destination = directory_open_box()
     try:
-        shutil.copy(source, destination)
+        fast_copy(source, destination)
         messagebox.showinfo("succeed", "succeed!")
-    except TypeError:
+    except (TypeError, shutil.SameFileError):
         messagebox.showinfo("error", "not succeed!")
 
 
@@ -98,9 +125,10 @@ def remove_directory():
 
 def list_files():
     path = directory_open_box()
-    listfiles = sorted(os.listdir(path))
-    for i in listfiles:
-        print(i)
+    with os.scandir(path) as entries:
+        listfiles = sorted(entry.name for entry in entries)
+    if listfiles:
+        sys.stdout.write("\n".join(listfiles) + "\n")
 
 
 window = Tk()
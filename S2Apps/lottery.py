@@ -1,6 +1,37 @@
 import tkinter as tk
 from tkinter import ttk ,filedialog,Button,messagebox
 import random
+import math
+from itertools import islice
+
+rng = random.SystemRandom()
+READ_BUFFER = 1024 * 1024
+
+
+def random_open_unit():
+    u = rng.random()
+    while u == 0.0:
+        u = rng.random()
+    return u
+
+
+# reservoir sampling (Algorithm L): pick num lines in one pass, keeping only num lines in memory
+# and jumping over the lines that can't be picked instead of drawing a number for each
+def sample_lines(file, num):
+    reservoir = list(islice(file, num))
+    if len(reservoir) == num:
+        log_w = math.log(random_open_unit()) / num
+        while True:
+            skip = math.floor(math.log(random_open_unit()) / math.log(-math.expm1(log_w)))
+            line = next(islice(file, skip, None), None)
+            if line is None:
+                break
+            reservoir[rng.randrange(num)] = line
+            log_w += math.log(random_open_unit()) / num
+    rng.shuffle(reservoir)
+    return [line.rstrip(b"\r\n").decode("utf-8") for line in reservoir]
+
+
 def select_file():
     file_path = filedialog.askopenfilename(filetypes=[("Text file","*.txt")])
     file_entry.delete(0,tk.END)
@@ -18,12 +49,11 @@ def select_winners():
         return
         
     try:
-        with open(file_path,"r") as file:
-            name_list = file.read().splitlines()
-            if len(name_list) < num :
+        with open(file_path,"rb",buffering=READ_BUFFER) as file:
+            winners_list = sample_lines(file,num)
+            if len(winners_list) < num :
                 messagebox.showwarning("Invalid input","please enter a valid number!")
                 return
-            winners_list = random.sample(name_list,num)
             top_window = tk.Toplevel()
             top_window.title("Winners")
             top_window.resizable(1,1)
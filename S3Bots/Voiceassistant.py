@@ -1,4 +1,6 @@
 import speech_recognition as sr
+from vosk import Model, KaldiRecognizer
+import json
 import pyttsx3
 import datetime
 import wikipedia
@@ -7,7 +9,10 @@ import os
 import time
 import subprocess
 import wolframalpha
-import requests
+import requests_cache
+import functools
+import atexit
+import threading
 import cv2
 import pyautogui
 from pprint import pprint
@@ -16,11 +21,56 @@ engine = pyttsx3.init()
 engine.setProperty('rate',150)
 voices = engine.getProperty('voices')
 engine.setProperty('voices',voices[0].id)
+atexit.register(engine.stop)
+
+# offline speech model, loaded once (download from https://alphacephei.com/vosk/models)
+VOSK_MODEL_PATH = "model-small-en-us"
+VOSK_SAMPLE_RATE = 16000
+vosk_model = Model(VOSK_MODEL_PATH)
+
+# repeated weather questions are answered from disk for an hour
+session = requests_cache.CachedSession("assistant_cache", expire_after=3600)
 
 def speak(text):
     engine.say(text)
     engine.runAndWait()
-    engine.stop()
+
+# the camera is opened on first use and kept open for a while, opening it is the slow part;
+# after CAMERA_IDLE_TIMEOUT seconds without a photo it is released (camera and its LED off)
+CAMERA_IDLE_TIMEOUT = 60
+CAMERA_FLUSH_FRAMES = 4
+_cam = None
+_cam_timer = None
+_cam_lock = threading.Lock()
+
+def release_camera():
+    global _cam
+    with _cam_lock:
+        if _cam is not None:
+            _cam.release()
+            _cam = None
+
+def take_photo():
+    global _cam, _cam_timer
+    with _cam_lock:
+        if _cam is None:
+            _cam = cv2.VideoCapture(0)
+            _cam.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        # drop frames the driver buffered since the last photo, so the picture is the current scene
+        for _ in range(CAMERA_FLUSH_FRAMES):
+            _cam.grab()
+        ret, frame = _cam.read()
+    # every photo restarts the idle countdown
+    if _cam_timer is not None:
+        _cam_timer.cancel()
+    _cam_timer = threading.Timer(CAMERA_IDLE_TIMEOUT, release_camera)
+    _cam_timer.daemon = True
+    _cam_timer.start()
+    return ret, frame
+
+@functools.lru_cache(maxsize=256)
+def wiki_summary(query, sentences):
+    return wikipedia.summary(query, sentences=sentences)
 
 text = "Hi, how are you"
 # speak(text)
@@ -50,12 +100,14 @@ def take_command():
         print("listenning...")
         audio = r.listen(source)
     try:
-        cm = r.recognize_google(audio, language="en-US")
+        # recognize locally instead of a round trip to google's api
+        rec = KaldiRecognizer(vosk_model, VOSK_SAMPLE_RATE)
+        rec.AcceptWaveform(audio.get_raw_data(convert_rate=VOSK_SAMPLE_RATE, convert_width=2))
+        cm = json.loads(rec.FinalResult())["text"]
+        if not cm:
+            print("Speech recognition could not understand your audio")
+            return "None"
         print(f"you said: {cm}\n")
-    except sr.UnknownValueError:
-        print("Speech recognition could not understand your audio")
-    except sr.RequestError as e:
-        print(f"Error sending request to Amazon Transcribe: {e}")
     except Exception as e:
         print(f"An error occurred: {e}")
         return "None"
@@ -99,6 +151,9 @@ while True:
     if "bye" in command or "stop" in command:
         print(f"Good Bye{NAME}")
         speak(f"Good Bye{NAME}")
+        if _cam_timer is not None:
+            _cam_timer.cancel()
+        release_camera()
         break
     
     if "wikipedia" in command :
@@ -114,7 +169,7 @@ while True:
         except:
             sentence = 3
         
-        result = wikipedia.summary(command,sentences=sentence)
+        result = wiki_summary(command,sentence)
         print(f"{sentence} sentences of your search results in wikipedia:\n")
         speak(f"{sentence} sentences of your search results in wikipedia")
         pprint(result + "\n")
@@ -143,12 +198,9 @@ while True:
         print(str_time+"\n")
         speak(f"the time is {str_time}")
     elif "camera" in command or "photo" in command:
-        camera = cv2.VideoCapture(0)
-        ret, frame = camera.read()
+        ret, frame = take_photo()
         if ret:
             cv2.imwrite("your_photo.png", frame)
-        camera.release()
-        cv2.destroyAllWindows()
         print("Your photo was taken.\n")
         speak("Your photo was taken.")
     elif "screenshot" in command:
@@ -229,7 +281,7 @@ while True:
         speak("What is the city name?")
         city_name = take_command()
         complete_url = base_url + "appid=" + api_key + "&q=" + city_name
-        response = requests.get(complete_url)
+        response = session.get(complete_url)
         res = response.json()
         if res["cod"] != "404":
             main = res["main"]
@@ -1,6 +1,10 @@
-from jinja2 import Environment,FileSystemLoader
+from jinja2 import Environment,FileSystemLoader,FileSystemBytecodeCache
+import os
 import jdatetime
-import pdfkit
+from weasyprint import HTML
+from weasyprint.text.fonts import FontConfiguration
+
+font_config = FontConfiguration()
 
 order_number = input("enter number: ")
 customer_number = input("customer name: ")
@@ -57,14 +61,13 @@ context = {'order_number':order_number,
 'terms_of_sale': terms_of_sale,
 'description': description,
 }
-env = Environment(loader=FileSystemLoader("templates"))
+# compiled templates are kept on disk so later runs skip parsing template.html
+os.makedirs(".jinja_cache",exist_ok=True)
+env = Environment(loader=FileSystemLoader("templates"),
+                  bytecode_cache=FileSystemBytecodeCache(".jinja_cache"),
+                  auto_reload=False)
 template = env.get_template("template.html")
 output = template.render(context=context)
-with open(r"templates/newtemplate.html",mode='w',encoding='utf-8') as tm:
-    tm.write(output)
-
-wkhtmltopdf =r"/usr/local/bin/wkhtmltopdf"
-file = r"templates/newtemplate.html"
-config = pdfkit.configuration(wkhtmltopdf=wkhtmltopdf)
-pdfkit.from_file(file,output_path="facture.pdf",configuration = config)
+# render the pdf in process straight from the string, no temp html file or wkhtmltopdf subprocess
+HTML(string=output,base_url="templates").write_pdf("facture.pdf",font_config=font_config)
     
\ No newline at end of file
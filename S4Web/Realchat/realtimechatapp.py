@@ -1,6 +1,13 @@
+# eventlet has to patch the stdlib before anything else opens sockets
+import eventlet
+eventlet.monkey_patch()
+
 from flask import Flask,request,render_template,redirect,url_for,session
 from flask_socketio import SocketIO,emit
+from flask_session import Session
+import redis
 import secrets
+import os
 # real time , server to client 
 
 from werkzeug.security import generate_password_hash,check_password_hash
@@ -9,24 +16,40 @@ from werkzeug.security import generate_password_hash,check_password_hash
 # print(check_password_hash(x,'mmdrezaw'))
 
 app = Flask(__name__)
-socketio = SocketIO(app)
+# one redis for sessions and accounts, so every instance sees the same users
+store = redis.Redis()
+# keep sessions server side in redis, the cookie only carries the session id
+app.config['SESSION_TYPE'] = 'redis'
+app.config['SESSION_REDIS'] = store
+Session(app)
+# gunicorn never runs __main__, so the key is set here and shared via the env
+app.secret_key = os.environ.get('SECRET_KEY')
+if not app.secret_key:
+    if __name__ != '__main__':
+        # a random key per instance would make cookies signed by one instance invalid on the others
+        # (and log everyone out on every restart)
+        raise RuntimeError("SECRET_KEY must be set, with the same value on every instance, "
+                           "when the app is served by gunicorn")
+    # python realtimechatapp.py is a single process, a throwaway key is fine there
+    app.secret_key = secrets.token_urlsafe(16)
+# gunicorn has no sticky sessions, which the socket.io handshake needs, so each instance runs a
+# single worker (gunicorn -k eventlet -w 1). To scale, run several instances behind a load balancer
+# with sticky sessions; broadcasts go through redis pub/sub so every instance sees them
+socketio = SocketIO(app,async_mode='eventlet',message_queue='redis://localhost:6379/0')
 
-users = {}
+# accounts live in the redis hash 'users': username -> password hash
 @app.route('/register',methods = ['POST','GET']) 
 def register():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
         confirm_password = request.form['confirm_password']
-        if username in users:
-            error = 'نام کاربری قبلا ثبت شده است!'
-        elif password != confirm_password:
+        if password != confirm_password:
             error = 'رمز عبور مطابقت ندارد'
+        # hsetnx checks and stores in one step, so two processes can't register the same name
+        elif not store.hsetnx('users',username,generate_password_hash(password,method='scrypt:32768:8:1')):
+            error = 'نام کاربری قبلا ثبت شده است!'
         else:
-            users[username] = {
-                'username': username,
-                'password': generate_password_hash(password),
-            }
             return redirect(url_for('login'))
         return render_template('register.html',error=error)
 
@@ -38,7 +61,8 @@ def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        if username in users and check_password_hash(users[username]['password'] ,password):
+        password_hash = store.hget('users',username)
+        if password_hash is not None and check_password_hash(password_hash.decode() ,password):
             session['username'] = username
             print('success')
             return redirect(url_for('index'))
@@ -65,5 +89,4 @@ def handle_message(message):
     emit('message',{'username':session['username'],'message':message},broadcast=True)
     
 if __name__ == '__main__':
-    app.secret_key = secrets.token_urlsafe(16)
     socketio.run(app,debug=True)
\ No newline at end of file
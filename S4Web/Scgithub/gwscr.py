@@ -1,24 +1,61 @@
+import math
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pprint import pprint
 
+SEARCH_URL = "https://github.com/search?q={lang}&type=repositories&s=stars&o=desc&p={page}"
+# kept small, github rate limits search pages
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+
+
+def fetch_page(session,lang,page):
+    for attempt in range(MAX_RETRIES + 1):
+        response = session.get(SEARCH_URL.format(lang=lang,page=page))
+        if response.status_code != 429 or attempt == MAX_RETRIES:
+            break
+        # rate limited: wait as long as github asks, or back off 1s, 2s, 4s
+        retry_after = response.headers.get('Retry-After','')
+        time.sleep(int(retry_after) if retry_after.isdigit() else 2 ** attempt)
+    if response.status_code != 200:
+        return None
+    return response.json()['payload']['results']
+
 
 def get_trending_repos(lang,num_repos):
-    repos = []
-    page = 1
-
-    while len(repos) < num_repos:
-        url = f"https://github.com/search?q={lang}&type=repositories&s=stars&o=desc&p={page}"
-        response = requests.get(url)
-
-        if response.status_code == 200:
-            data = response.json()
-            page_repo = data['payload']['results']
-            repos.extend(page_repo)
-            # pprint(page_repo)
-            page += 1
-        else:
+    # requests.Session is not documented as thread safe, so every worker thread gets its own
+    # keep-alive session (pages after a thread's first one skip the TCP/TLS handshake)
+    local = threading.local()
+    sessions = []
+
+    def fetch(page):
+        session = getattr(local,'session',None)
+        if session is None:
+            session = local.session = requests.Session()
+            sessions.append(session)
+        return fetch_page(session,lang,page)
+
+    try:
+        repos = fetch(1)
+        if repos is None:
             print('Error!')
             return []
+        if not repos:
+            return []
+        # the first page tells us the page size, the rest are fetched concurrently
+        pages_needed = math.ceil(num_repos / len(repos))
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            for page_repo in pool.map(fetch,range(2,pages_needed + 1)):
+                if page_repo is None:
+                    print('Error!')
+                    return []
+                # pprint(page_repo)
+                repos.extend(page_repo)
+    finally:
+        for session in sessions:
+            session.close()
     return repos[:num_repos]
     
 lang = input("enter language: ")
@@ -3,32 +3,38 @@ from PIL import Image
 import pytesseract
 
 import pathlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from googletrans import Translator
 translator = Translator()
 
 pytesseract.pytesseract.tesseract_cmd = r"/opt/homebrew/Cellar/tesseract/5.4.1/bin/tesseract"
 
-per_text = ""
+
+def ocr(path, lang):
+    return pytesseract.image_to_string(Image.open(path) ,lang=lang)
+
+
+def image_files(folder):
+    return [path for path in pathlib.Path(folder).iterdir() if path.is_file()]
+
+
 ans = input("translated? ")
 
-for path in pathlib.Path("per_pics").iterdir():
-    if path.is_file():
-        img = path
-        per_text += pytesseract.image_to_string(Image.open(img) ,lang="fas")
-        per_text += 50 * "_" + "\n"
-        
-text = ""       
-for path in pathlib.Path("eng_pics").iterdir():
-    if path.is_file():
-        img = path
-        eng = pytesseract.image_to_string(Image.open(img) ,lang="eng")
-        if "y" in ans:
-            t = translator.translate(eng ,src="en",dest="fa")
-            text += t.text
-        else:
-            text += eng
-            
-        text +="\n" + 50 * "_" + "\n"
+# every image_to_string call runs its own tesseract process, so threads are enough to use all cores;
+# one OpenMP thread per process, otherwise each of them starts a thread per core and they fight over the cores
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+    per_chunks = pool.map(partial(ocr, lang="fas"), image_files("per_pics"))
+    eng_chunks = list(pool.map(partial(ocr, lang="eng"), image_files("eng_pics")))
+    per_text = "".join(chunk + 50 * "_" + "\n" for chunk in per_chunks)
+
+if "y" in ans and eng_chunks:
+    # a list is sent to google translate as one request instead of one per image
+    eng_chunks = [t.text for t in translator.translate(eng_chunks ,src="en",dest="fa")]
+
+text = "".join(chunk + "\n" + 50 * "_" + "\n" for chunk in eng_chunks)
 
 with open("text.txt",mode="w",encoding="utf-8") as t:
     t.write(text)
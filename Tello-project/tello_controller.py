@@ -25,9 +25,12 @@ Tello Drone Controller
 """
 
 import pygame
+import pygame.freetype
 import time
 import os
 import sys
+import math
+import threading
 
 # کتابخانه‌های مورد نیاز برای پهپاد تلو
 try:
@@ -44,7 +47,70 @@ except ImportError:
 # تنظیمات کنترل
 SPEED = 60          # سرعت حرکت پهپاد (0-100)
 FPS = 30            # فریم در ثانیه برای نمایش
+IDLE_TIMEOUT = 100  # حداکثر انتظار برای رویداد به میلی‌ثانیه (بررسی تغییرات باتری/اتصال)
 CONNECTION_TIMEOUT = 10  # مهلت زمانی اتصال به ثانیه
+TEXT_CACHE_SIZE = 256    # حداکثر تعداد متن‌های رندر شده در حافظه
+RC_RATE = 20             # تعداد ارسال دستور کنترل در ثانیه
+BATTERY_INTERVAL = 3     # فاصله خواندن باتری به ثانیه
+RC_SMOOTHING = 0.15      # ثابت زمانی نرم کردن تغییر سرعت به ثانیه (0 = بدون نرم‌سازی)
+
+# کلیدهای قابل نمایش و بیت هر کلید در pressed_mask
+KEY_LABELS = ['W', 'S', 'A', 'D', 'UP', 'DOWN', 'LEFT', 'RIGHT', 'T', 'L', 'ESCAPE']
+KEY_BITS = {
+    pygame.K_w: 0, pygame.K_s: 1, pygame.K_a: 2, pygame.K_d: 3,
+    pygame.K_UP: 4, pygame.K_DOWN: 5, pygame.K_LEFT: 6, pygame.K_RIGHT: 7,
+    pygame.K_t: 8, pygame.K_l: 9, pygame.K_ESCAPE: 10,
+}
+
+
+def smooth_rc(prev, target, dt, tau):
+    """
+    نزدیک کردن تدریجی سرعت‌های ارسال شده به مقدار هدف (فیلتر پایین‌گذر مرتبه اول)
+    
+    فقط شروع حرکت نرم می‌شود؛ با رها کردن کلید (هدف صفر) سرعت فوراً صفر می‌شود
+    تا پهپاد پس از رها کردن کلید به حرکت ادامه ندهد.
+    """
+    
+    if tau <= 0:
+        return tuple(target)
+    
+    k = 1 - math.exp(-dt / tau)
+    result = []
+    for p, t in zip(prev, target):
+        diff = t - p
+        if t == 0 or abs(diff) <= 1:
+            result.append(t)
+        else:
+            # حداقل یک واحد جابجایی تا مقدار هرگز در نزدیکی هدف گیر نکند
+            step = max(1, round(abs(diff) * k))
+            result.append(p + step if diff > 0 else p - step)
+    return tuple(result)
+
+# برچسب خطوط سرعت (به همراه فاصله، یک بار ساخته می‌شوند)
+VEL_LABELS = ("جلو/عقب: ", "چپ/راست: ", "بالا/پایین: ", "چرخش: ")
+
+# دستورالعمل‌ها (فارسی و انگلیسی)
+INSTRUCTIONS_FA = [
+    "دستورالعمل کنترل:",
+    "T - برخاستن (Takeoff)",
+    "L - فرود آمدن (Landing)", 
+    "W/S - جلو/عقب",
+    "A/D - چپ/راست",
+    "↑/↓ - بالا/پایین",
+    "←/→ - چرخش چپ/راست",
+    "ESC - توقف اضطراری"
+]
+
+INSTRUCTIONS_EN = [
+    "CONTROLS:",
+    "T - Takeoff",
+    "L - Land",
+    "W/S - Forward/Back", 
+    "A/D - Left/Right",
+    "↑/↓ - Up/Down",
+    "←/→ - Rotate Left/Right", 
+    "ESC - Emergency Stop"
+]
 
 class TelloController:
     """
@@ -74,8 +140,19 @@ class TelloController:
         self.battery_level = 0
         self.connected = False
         
-        # کلیدهای فشرده شده (برای نمایش)
-        self.pressed_keys = set()
+        # کلیدهای فشرده شده (برای نمایش) به صورت بیت‌ماسک
+        self.pressed_mask = 0
+        self._pressed_surface = (0, None)
+        # آخرین مقدار و Surface هر خط سرعت
+        self._vel_prev = [None] * 4
+        self._vel_surfs = [None] * 4
+        
+        # فقط در صورت تغییر وضعیت، صفحه دوباره رسم می‌شود
+        self._dirty = True
+        
+        # ارتباط با پهپاد در یک رشته جداگانه انجام می‌شود تا حلقه نمایش متوقف نشود
+        self._rc_lock = threading.Lock()
+        self._rc_thread = None
         
         # اتصال به پهپاد
         self.connect_to_drone()
@@ -91,6 +168,10 @@ class TelloController:
         pygame.init()
         pygame.mixer.quit()  # غیرفعال کردن صدا
         
+        # فقط رویدادهای مورد استفاده وارد صف می‌شوند (حرکت ماوس و ... در لایه SDL دور ریخته می‌شود)
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.VIDEOEXPOSE])
+        
         # تنظیم پنجره نمایش
         width, height = 900, 700
         flags = pygame.DOUBLEBUF | pygame.HWSURFACE
@@ -102,10 +183,56 @@ class TelloController:
         pygame.display.flip()
         
         # فونت‌ها برای نمایش متن
-        self.font_title = pygame.font.Font(None, 42)
-        self.font_large = pygame.font.Font(None, 32)
-        self.font_medium = pygame.font.Font(None, 24)
-        self.font_small = pygame.font.Font(None, 18)
+        # (freetype گلیف‌ها را کش می‌کند؛ اندازه‌ها معادل اندازه‌های قبلی pygame.font هستند)
+        pygame.freetype.init()
+        self.font_title = pygame.freetype.Font(None, 29)
+        self.font_large = pygame.freetype.Font(None, 22)
+        self.font_medium = pygame.freetype.Font(None, 16)
+        self.font_small = pygame.freetype.Font(None, 12)
+        
+        # کش متن‌های رندر شده و متن‌های ثابت که فقط یک بار رندر می‌شوند
+        self._text_cache = {}
+        self._build_static_surfaces()
+
+    def _render(self, font, text, color):
+        """رندر متن با استفاده از کش (هر متن فقط یک بار رسترایز می‌شود)"""
+        
+        key = (id(font), text, color)
+        surface = self._text_cache.get(key)
+        if surface is None:
+            # حذف قدیمی‌ترین مورد در صورت پر شدن کش
+            if len(self._text_cache) >= TEXT_CACHE_SIZE:
+                del self._text_cache[next(iter(self._text_cache))]
+            # تبدیل به فرمت پیکسلی صفحه تا blit بدون تبدیل فرمت انجام شود
+            surface, _ = font.render(text, color)
+            surface = surface.convert_alpha()
+            self._text_cache[key] = surface
+        return surface
+
+    def _build_static_surfaces(self):
+        """رندر یک باره عنوان و دستورالعمل‌ها"""
+        
+        title_surface = self._render(self.font_title, "کنترل کننده پهپاد تلو", (255, 255, 255))
+        subtitle_surface = self._render(self.font_medium, "Tello Drone Controller", (200, 200, 200))
+        self._static_surfaces = [
+            (title_surface, title_surface.get_rect(center=(450, 50))),
+            (subtitle_surface, subtitle_surface.get_rect(center=(450, 85))),
+        ]
+        
+        # همه خطوط دستورالعمل روی یک Surface ترکیب می‌شوند تا در هر فریم فقط یک blit لازم باشد
+        line_height = 28
+        instructions_surface = pygame.Surface((600, len(INSTRUCTIONS_FA) * line_height), pygame.SRCALPHA)
+        for i, (fa_text, en_text) in enumerate(zip(INSTRUCTIONS_FA, INSTRUCTIONS_EN)):
+            if i == 0:  # عنوان
+                color = (255, 255, 255)
+                font = self.font_medium
+            else:
+                color = (200, 200, 200)
+                font = self.font_small
+            # render_to مستقیماً روی Surface ترکیبی می‌نویسد (بدون Surface میانی)
+            font.render_to(instructions_surface, (0, i * line_height), fa_text, color)
+            font.render_to(instructions_surface, (300, i * line_height), en_text, color)
+        self._static_surfaces.append((instructions_surface.convert_alpha(), (50, 420)))
 
     def init_tello(self):
         """مقداردهی پهپاد تلو"""
@@ -133,6 +260,10 @@ class TelloController:
             self.battery_level = self.tello.get_battery()
             self.connected = True
             
+            # شروع ارسال دستورات و خواندن باتری در پس‌زمینه
+            self._rc_thread = threading.Thread(target=self._rc_worker, daemon=True)
+            self._rc_thread.start()
+            
             # غیرفعال کردن استریم ویدیو (در صورت روشن بودن)
             self.tello.streamoff()
             
@@ -166,28 +297,21 @@ class TelloController:
         # پاک کردن صفحه
         self.screen.fill((20, 25, 40))
         
-        # عنوان اصلی
-        title_text = "کنترل کننده پهپاد تلو"
-        title_surface = self.font_title.render(title_text, True, (255, 255, 255))
-        title_rect = title_surface.get_rect(center=(450, 50))
-        self.screen.blit(title_surface, title_rect)
-        
-        subtitle_text = "Tello Drone Controller"
-        subtitle_surface = self.font_medium.render(subtitle_text, True, (200, 200, 200))
-        subtitle_rect = subtitle_surface.get_rect(center=(450, 85))
-        self.screen.blit(subtitle_surface, subtitle_rect)
+        # عنوان و دستورالعمل‌ها (از قبل رندر شده)
+        for surface, pos in self._static_surfaces:
+            self.screen.blit(surface, pos)
         
         # وضعیت اتصال
         status_color = (50, 255, 50) if self.connected else (255, 100, 100)
         status_text = "🟢 متصل" if self.connected else "🔴 قطع شده"
-        status_surface = self.font_large.render(status_text, True, status_color)
+        status_surface = self._render(self.font_large, status_text, status_color)
         status_rect = status_surface.get_rect(center=(450, 130))
         self.screen.blit(status_surface, status_rect)
         
         # وضعیت پرواز
         flight_color = (255, 255, 50) if self.is_flying else (150, 150, 150)
         flight_text = "🚁 در حال پرواز" if self.is_flying else "🛬 روی زمین"
-        flight_surface = self.font_large.render(flight_text, True, flight_color)
+        flight_surface = self._render(self.font_large, flight_text, flight_color)
         flight_rect = flight_surface.get_rect(center=(450, 170))
         self.screen.blit(flight_surface, flight_rect)
         
@@ -203,89 +327,52 @@ class TelloController:
             battery_icon = "🟢"
             
         battery_text = f"{battery_icon} باتری: {self.battery_level}%"
-        battery_surface = self.font_large.render(battery_text, True, battery_color)
+        battery_surface = self._render(self.font_large, battery_text, battery_color)
         battery_rect = battery_surface.get_rect(center=(450, 210))
         self.screen.blit(battery_surface, battery_rect)
         
         # سرعت‌های فعلی
         vel_start_y = 270
-        vel_texts = [
-            ("جلو/عقب:", self.for_back_velocity),
-            ("چپ/راست:", self.left_right_velocity), 
-            ("بالا/پایین:", self.up_down_velocity),
-            ("چرخش:", self.yaw_velocity)
-        ]
-        
-        for i, (label, value) in enumerate(vel_texts):
-            color = (100, 255, 255) if abs(value) > 0 else (150, 150, 150)
-            text = f"{label} {value:4d}"
-            vel_surface = self.font_medium.render(text, True, color)
-            self.screen.blit(vel_surface, (300, vel_start_y + i * 30))
-        
-        # دستورالعمل‌ها
-        instructions_fa = [
-            "دستورالعمل کنترل:",
-            "T - برخاستن (Takeoff)",
-            "L - فرود آمدن (Landing)", 
-            "W/S - جلو/عقب",
-            "A/D - چپ/راست",
-            "↑/↓ - بالا/پایین",
-            "←/→ - چرخش چپ/راست",
-            "ESC - توقف اضطراری"
-        ]
-        
-        instructions_en = [
-            "CONTROLS:",
-            "T - Takeoff",
-            "L - Land",
-            "W/S - Forward/Back", 
-            "A/D - Left/Right",
-            "↑/↓ - Up/Down",
-            "←/→ - Rotate Left/Right", 
-            "ESC - Emergency Stop"
-        ]
-        
-        # نمایش دستورالعمل‌ها (فارسی و انگلیسی)
-        start_y = 420
-        for i, (fa_text, en_text) in enumerate(zip(instructions_fa, instructions_en)):
-            if i == 0:  # عنوان
-                color = (255, 255, 255)
-                font = self.font_medium
-            else:
-                color = (200, 200, 200)
-                font = self.font_small
-                
-            # متن فارسی
-            fa_surface = font.render(fa_text, True, color)
-            self.screen.blit(fa_surface, (50, start_y + i * 28))
-            
-            # متن انگلیسی
-            en_surface = font.render(en_text, True, color)
-            self.screen.blit(en_surface, (350, start_y + i * 28))
-        
-        # کلیدهای فشرده شده
-        if self.pressed_keys:
-            pressed_text = f"کلیدهای فعال: {', '.join(sorted(self.pressed_keys))}"
-            pressed_surface = self.font_small.render(pressed_text, True, (255, 255, 100))
-            self.screen.blit(pressed_surface, (50, 650))
+        vel_values = (self.for_back_velocity, self.left_right_velocity,
+                      self.up_down_velocity, self.yaw_velocity)
+        
+        for i, value in enumerate(vel_values):
+            # فقط خطوطی که مقدارشان تغییر کرده دوباره ساخته می‌شوند
+            if value != self._vel_prev[i]:
+                color = (100, 255, 255) if value else (150, 150, 150)
+                self._vel_surfs[i] = self._render(self.font_medium, f"{VEL_LABELS[i]}{value:4d}", color)
+                self._vel_prev[i] = value
+            self.screen.blit(self._vel_surfs[i], (300, vel_start_y + i * 30))
+        
+        # کلیدهای فشرده شده (فقط در صورت تغییر ماسک دوباره ساخته می‌شود)
+        if self.pressed_mask:
+            if self._pressed_surface[0] != self.pressed_mask:
+                names = ', '.join(label for i, label in enumerate(KEY_LABELS) if self.pressed_mask >> i & 1)
+                pressed_text = f"کلیدهای فعال: {names}"
+                self._pressed_surface = (self.pressed_mask,
+                                         self._render(self.font_small, pressed_text, (255, 255, 100)))
+            self.screen.blit(self._pressed_surface[1], (50, 650))
         
         # هشدارهای ایمنی
         warnings_y = 680
         if not self.connected:
             warning_text = "⚠️ اتصال برقرار نیست - کنترل غیرفعال"
-            warning_surface = self.font_small.render(warning_text, True, (255, 100, 100))
+            warning_surface = self._render(self.font_small, warning_text, (255, 100, 100))
             self.screen.blit(warning_surface, (50, warnings_y))
         elif self.battery_level < 20:
             warning_text = "⚠️ باتری کم - هرچه زودتر فرود آمدن توصیه می‌شود"
-            warning_surface = self.font_small.render(warning_text, True, (255, 100, 100))
+            warning_surface = self._render(self.font_small, warning_text, (255, 100, 100))
             self.screen.blit(warning_surface, (50, warnings_y))
 
     def handle_key_down(self, key):
         """مدیریت فشردن کلیدها"""
         
-        # افزودن نام کلید به لیست کلیدهای فشرده شده
-        key_name = pygame.key.name(key).upper()
-        self.pressed_keys.add(key_name)
+        self._dirty = True
+        
+        # روشن کردن بیت کلید فشرده شده
+        bit = KEY_BITS.get(key)
+        if bit is not None:
+            self.pressed_mask |= 1 << bit
         
         # برخاستن
         if key == pygame.K_t and not self.is_flying and self.connected:
@@ -353,9 +440,12 @@ class TelloController:
     def handle_key_up(self, key):
         """مدیریت رها کردن کلیدها"""
         
-        # حذف نام کلید از لیست کلیدهای فشرده شده
-        key_name = pygame.key.name(key).upper()
-        self.pressed_keys.discard(key_name)
+        self._dirty = True
+        
+        # خاموش کردن بیت کلید رها شده
+        bit = KEY_BITS.get(key)
+        if bit is not None:
+            self.pressed_mask &= ~(1 << bit)
         
         # توقف حرکات
         if key in (pygame.K_w, pygame.K_s):
@@ -367,12 +457,49 @@ class TelloController:
         elif key in (pygame.K_LEFT, pygame.K_RIGHT):
             self.yaw_velocity = 0
 
+    def _rc_worker(self):
+        """ارسال دستورات کنترل با نرخ ثابت و خواندن باتری در پس‌زمینه"""
+        
+        period = 1 / RC_RATE
+        next_send = time.monotonic()
+        next_battery = next_send + BATTERY_INTERVAL
+        last_send = next_send
+        sent = (0, 0, 0, 0)
+        
+        while self.send_rc and self.connected:
+            now = time.monotonic()
+            if self.is_flying:
+                with self._rc_lock:
+                    target = (self.left_right_velocity, self.for_back_velocity,
+                              self.up_down_velocity, self.yaw_velocity)
+                sent = smooth_rc(sent, target, now - last_send, RC_SMOOTHING)
+                try:
+                    self.tello.send_rc_control(*sent)
+                except Exception as e:
+                    print(f"خطا در ارسال دستور: {e}")
+                    self.connected = False
+                    self._dirty = True
+                    break
+            else:
+                sent = (0, 0, 0, 0)
+            last_send = now
+            
+            if now >= next_battery:
+                self.update_battery()
+                next_battery = now + BATTERY_INTERVAL
+            
+            next_send += period
+            time.sleep(max(0.0, next_send - time.monotonic()))
+
     def update_battery(self):
         """به‌روزرسانی سطح باتری"""
         
         if self.connected:
             try:
-                self.battery_level = self.tello.get_battery()
+                battery_level = self.tello.get_battery()
+                if battery_level != self.battery_level:
+                    self.battery_level = battery_level
+                    self._dirty = True
             except Exception as e:
                 print(f"خطا در خواندن باتری: {e}")
 
@@ -380,7 +507,6 @@ class TelloController:
         """حلقه اصلی برنامه"""
         
         clock = pygame.time.Clock()
-        battery_update_counter = 0
         
         print("✅ کنترل کننده فعال شد")
         print("📺 پنجره نمایش باید قابل مشاهده باشد")
@@ -391,40 +517,31 @@ class TelloController:
             print("🎮 آماده کنترل!")
         
         while self.send_rc:
-            # مدیریت رویدادهای pygame
-            for event in pygame.event.get():
+            # انتظار برای رویداد بعدی؛ بدون فشردن کلید حلقه تقریباً بیکار می‌ماند
+            # (باتری در رشته پس‌زمینه خوانده می‌شود و فقط پرچم _dirty را تنظیم می‌کند)
+            first_event = pygame.event.wait(IDLE_TIMEOUT)
+            for event in [first_event] + pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.send_rc = False
+                # قفل باعث می‌شود رشته پس‌زمینه سرعت‌ها را نیمه‌کاره نخواند
+                # (و هنگام برخاستن/فرود دستور کنترل نفرستد)
                 elif event.type == pygame.KEYDOWN:
-                    self.handle_key_down(event.key)
+                    with self._rc_lock:
+                        self.handle_key_down(event.key)
                 elif event.type == pygame.KEYUP:
-                    self.handle_key_up(event.key)
+                    with self._rc_lock:
+                        self.handle_key_up(event.key)
+                elif event.type == pygame.VIDEOEXPOSE:
+                    # بازسازی نمایش وقتی پنجره دوباره نمایان می‌شود
+                    self._dirty = True
             
-            # ارسال دستورات کنترل از راه دور
-            if self.is_flying and self.connected:
-                try:
-                    self.tello.send_rc_control(
-                        self.left_right_velocity,
-                        self.for_back_velocity, 
-                        self.up_down_velocity,
-                        self.yaw_velocity
-                    )
-                except Exception as e:
-                    print(f"خطا در ارسال دستور: {e}")
-                    self.connected = False
-            
-            # به‌روزرسانی باتری (هر 3 ثانیه)
-            battery_update_counter += 1
-            if battery_update_counter >= (FPS * 3):  # هر 3 ثانیه
-                self.update_battery()
-                battery_update_counter = 0
-            
-            # به‌روزرسانی نمایش
-            self.draw_ui()
-            pygame.display.flip()
-            
-            # محدود کردن FPS
-            clock.tick(FPS)
+            # به‌روزرسانی نمایش (فقط در صورت تغییر)
+            if self._dirty:
+                self.draw_ui()
+                pygame.display.flip()
+                self._dirty = False
+                # محدود کردن FPS هنگام تغییرات پشت سر هم
+                clock.tick(FPS)
         
         # پاکسازی قبل از خروج
         self.cleanup()
@@ -434,6 +551,11 @@ class TelloController:
         
         print("🧹 در حال پاکسازی...")
         
+        # توقف رشته ارسال دستورات پیش از فرود نهایی
+        self.send_rc = False
+        if self._rc_thread is not None:
+            self._rc_thread.join(timeout=1)
+        
         # اگر پهپاد در حال پرواز است، فرود آمدن
         if self.is_flying and self.connected:
             print("🛬 فرود نهایی...")
@@ -26,26 +26,56 @@ Tello Drone Controller
 from bidi.algorithm import get_display
 import arabic_reshaper
 import pygame
+import pygame.freetype
+import re
 import time
 import os
 import sys
+import queue
+import threading
+import functools
+import string
+
+@functools.lru_cache(maxsize=512)
+def _shape(text):
+    '''شکل‌دهی حروف و ترتیب RTL (نتیجه برای متن‌های تکراری کش می‌شود)'''
+    return get_display(arabic_reshaper.reshape(text))
 
 def to_rtl(text):
     '''تبدیل متن های فارسی به rtl'''
-    reshaped_text = arabic_reshaper.reshape(text)
-    bidi_text = get_display(reshaped_text)
-    print(bidi_text)
+    sys.stdout.write(_shape(text) + '\n')
+
+# حروف راست به چپ (عبری، عربی/فارسی و شکل‌های نمایشی آن‌ها)
+_RTL_RE = re.compile(r'[\u0590-\u08FF\uFB1D-\uFDFF\uFE70-\uFEFF]')
 
-def render_persian_text(font, text, color):
+def render_persian_text(font, text, color, cache=None):
     """
     تبدیل متن فارسی به شکل صحیح و RTL و رندر آن با pygame.
+    در صورت دادن دیکشنری cache، هر متن فقط یک بار شکل‌دهی و رسترایز می‌شود.
     """
-    # شکل‌دهی حروف فارسی
-    reshaped = arabic_reshaper.reshape(text)
-    # ترتیب صحیح حروف برای RTL
-    bidi_text = get_display(reshaped)
+    if cache is not None:
+        key = (id(font), text, color)
+        surface = cache.get(key)
+        if surface is not None:
+            return surface
+    
+    if _RTL_RE.search(text):
+        # شکل‌دهی حروف فارسی و ترتیب صحیح حروف برای RTL
+        surface, _ = font.render(_shape(text), color)
+    else:
+        # متن بدون حروف راست به چپ نیازی به شکل‌دهی و bidi ندارد
+        surface, _ = font.render(text, color)
+    
+    # تبدیل به فرمت پیکسلی صفحه تا blit بدون تبدیل فرمت انجام شود
+    surface = surface.convert_alpha()
+    
+    if cache is not None:
+        # حذف قدیمی‌ترین مورد در صورت پر شدن کش
+        if len(cache) >= TEXT_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        cache[key] = surface
     # بازگرداندن Surface برای blit
-    return font.render(bidi_text, True, color)
+    return surface
 
 
 
@@ -65,6 +95,53 @@ except ImportError:
 SPEED = 60          # سرعت حرکت پهپاد (0-100)
 FPS = 30            # فریم در ثانیه برای نمایش
 CONNECTION_TIMEOUT = 10  # مهلت زمانی اتصال به ثانیه
+TEXT_CACHE_SIZE = 256    # حداکثر تعداد متن‌های رندر شده در حافظه
+RC_INTERVAL = 0.05       # فاصله بررسی و ارسال دستورات کنترل به ثانیه (20 بار در ثانیه)
+RC_KEEPALIVE = 0.5       # حداکثر فاصله بین دو دستور کنترل وقتی سرعت‌ها تغییر نکرده‌اند
+BATTERY_INTERVAL = 3     # فاصله خواندن باتری به ثانیه
+
+# همه حروفی که ممکن است نمایش داده شوند: ASCII و شکل‌های نمایشی حروف فارسی/عربی
+WARMUP_CHARS = (string.digits + string.ascii_letters + string.punctuation + " ↑↓←→"
+                + "".join(chr(c) for c in range(0xFB50, 0xFC00))
+                + "".join(chr(c) for c in range(0xFE70, 0xFF00)))
+
+# متن‌های ثابت رابط کاربری
+TITLE_TEXT = "کنترل کننده پهپاد تلو"
+SUBTITLE_TEXT = "Tello Drone Controller"
+
+# کلیدهای قابل نمایش و بیت هر کلید در pressed_mask
+KEY_LABELS = ['W', 'S', 'A', 'D', 'UP', 'DOWN', 'LEFT', 'RIGHT', 'T', 'L', 'ESCAPE']
+KEY_BITS = {
+    pygame.K_w: 0, pygame.K_s: 1, pygame.K_a: 2, pygame.K_d: 3,
+    pygame.K_UP: 4, pygame.K_DOWN: 5, pygame.K_LEFT: 6, pygame.K_RIGHT: 7,
+    pygame.K_t: 8, pygame.K_l: 9, pygame.K_ESCAPE: 10,
+}
+
+# برچسب خطوط سرعت
+VEL_LABELS = ("جلو/عقب:", "چپ/راست:", "بالا/پایین:", "چرخش:")
+
+# دستورالعمل‌ها (فارسی و انگلیسی)
+INSTRUCTIONS_FA = [
+    "دستورالعمل کنترل:",
+    "T - برخاستن (Takeoff)",
+    "L - فرود آمدن (Landing)", 
+    "W/S - جلو/عقب",
+    "A/D - چپ/راست",
+    "↑/↓ - بالا/پایین",
+    "←/→ - چرخش چپ/راست",
+    "ESC - توقف اضطراری"
+]
+
+INSTRUCTIONS_EN = [
+    "CONTROLS:",
+    "T - Takeoff",
+    "L - Land",
+    "W/S - Forward/Back", 
+    "A/D - Left/Right",
+    "↑/↓ - Up/Down",
+    "←/→ - Rotate Left/Right", 
+    "ESC - Emergency Stop"
+]
 
 
 
@@ -75,6 +152,14 @@ class TelloController:
     
     این کلاس اتصال به پهپاد، نمایش وضعیت و کنترل با کیبورد را مدیریت می‌کند.
     """
+    
+    # محورهای حرکت: (متغیر سرعت، کلید جهت مثبت، کلید جهت منفی)
+    _AXES = (
+        ('for_back_velocity', pygame.K_w, pygame.K_s),
+        ('left_right_velocity', pygame.K_d, pygame.K_a),
+        ('up_down_velocity', pygame.K_UP, pygame.K_DOWN),
+        ('yaw_velocity', pygame.K_RIGHT, pygame.K_LEFT),
+    )
 
     def __init__(self):
         """مقداردهی اولیه کنترل کننده"""
@@ -97,11 +182,25 @@ class TelloController:
         self.battery_level = 0
         self.connected = False
         
-        # کلیدهای فشرده شده (برای نمایش)
-        self.pressed_keys = set()
+        # کلیدهای فشرده شده (برای نمایش) به صورت بیت‌ماسک
+        self.pressed_mask = 0
+        self._pressed_surface = (0, None)
+        
+        # صف دستورات برای رشته ارتباط با پهپاد و صف اطلاعات دریافتی از آن
+        self._command_queue = queue.SimpleQueue()
+        self._telemetry_queue = queue.SimpleQueue()
+        self._command_pending = False   # برخاستن/فرود در حال انجام
+        self._emergency = threading.Event()   # پس از توقف اضطراری دستور دیگری اجرا نمی‌شود
+        self._drone_thread = None
         
         # اتصال به پهپاد
         self.connect_to_drone()
+        
+        # پس از اتصال همه ارتباط با پهپاد در یک رشته پس‌زمینه انجام می‌شود
+        # تا حلقه اصلی هرگز منتظر پاسخ پهپاد نماند
+        if self.connected:
+            self._drone_thread = threading.Thread(target=self._drone_worker, daemon=True)
+            self._drone_thread.start()
 
     def init_pygame(self):
         """مقداردهی pygame و پنجره نمایش"""
@@ -110,13 +209,18 @@ class TelloController:
         if sys.platform == "darwin":
             os.environ['SDL_VIDEODRIVER'] = 'cocoa'
         
-        # مقداردهی pygame
-        pygame.init()
-        pygame.mixer.quit()  # غیرفعال کردن صدا
+        # مقداردهی فقط بخش‌های مورد استفاده pygame (بدون صدا و جوی‌استیک)
+        pygame.display.init()
+        pygame.freetype.init()
+        
+        # فقط رویدادهای مورد استفاده وارد صف می‌شوند (حرکت ماوس و ... در لایه SDL دور ریخته می‌شود)؛
+        # KEYUP فقط حلقه را بیدار می‌کند تا رها کردن کلید بلافاصله اعمال شود
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP])
         
         # تنظیم پنجره نمایش
         width, height = 900, 700
-        flags = pygame.DOUBLEBUF | pygame.HWSURFACE
+        flags = pygame.DOUBLEBUF  # HWSURFACE در SDL2 بی‌اثر است
         self.screen = pygame.display.set_mode((width, height), flags)
         pygame.display.set_caption("کنترل کننده پهپاد تلو - Tello Drone Controller")
         
@@ -125,10 +229,57 @@ class TelloController:
         pygame.display.flip()
         
         # فونت‌ها برای نمایش متن
-        self.font_title = pygame.font.Font("Vazirmatn.ttf", 42)
-        self.font_large = pygame.font.Font("Vazirmatn.ttf", 32)
-        self.font_medium = pygame.font.Font("Vazirmatn.ttf", 24)
-        self.font_small = pygame.font.Font("Vazirmatn.ttf", 18)
+        # (freetype گلیف‌ها را کش می‌کند و render_to مستقیماً روی Surface مقصد می‌نویسد)
+        self.font_title = pygame.freetype.Font("Vazirmatn.ttf", 42)
+        self.font_large = pygame.freetype.Font("Vazirmatn.ttf", 32)
+        self.font_medium = pygame.freetype.Font("Vazirmatn.ttf", 24)
+        self.font_small = pygame.freetype.Font("Vazirmatn.ttf", 18)
+        for font in (self.font_title, self.font_large, self.font_medium, self.font_small):
+            # ارتفاع ثابت خط مانند pygame.font تا عدد و برچسب کنار هم هم‌تراز بمانند
+            font.pad = True
+        
+        # کش متن‌های متغیر و پس‌زمینه ثابت (عنوان و دستورالعمل‌ها)
+        self._text_cache = {}
+        self._build_static_bg()
+        
+        # آخرین سرعت‌های نمایش داده شده و Surfaceهای آن‌ها
+        self._last_vel = None
+        self._vel_surfs = []
+        
+        # رسترایز یک باره همه حروف تا اولین نمایش یک متن جدید پرش نداشته باشد
+        for font in (self.font_title, self.font_large, self.font_medium, self.font_small):
+            font.render(WARMUP_CHARS, (255, 255, 255))
+
+    def _build_static_bg(self):
+        """رندر یک باره پس‌زمینه، عنوان و دستورالعمل‌ها روی یک Surface"""
+        
+        self._static_bg = pygame.Surface(self.screen.get_size()).convert()
+        self._static_bg.fill((20, 25, 40))
+        # ناحیه‌های به‌روز شده در فریم قبل (فریم اول کل صفحه)
+        self._last_rects = [self._static_bg.get_rect()]
+        # وضعیت نمایش داده شده در آخرین فریم
+        self._last_state = None
+        
+        # عنوان اصلی
+        title_surface = render_persian_text(self.font_title, TITLE_TEXT, (255, 255, 255))
+        self._static_bg.blit(title_surface, title_surface.get_rect(center=(450, 50)))
+        
+        subtitle_surface = render_persian_text(self.font_medium, SUBTITLE_TEXT, (200, 200, 200))
+        self._static_bg.blit(subtitle_surface, subtitle_surface.get_rect(center=(450, 85)))
+        
+        # نمایش دستورالعمل‌ها (فارسی و انگلیسی)
+        start_y = 420
+        for i, (fa_text, en_text) in enumerate(zip(INSTRUCTIONS_FA, INSTRUCTIONS_EN)):
+            if i == 0:  # عنوان
+                color = (255, 255, 255)
+                font = self.font_medium
+            else:
+                color = (200, 200, 200)
+                font = self.font_small
+                
+            # متن فارسی و انگلیسی مستقیماً روی پس‌زمینه (بدون Surface میانی)
+            font.render_to(self._static_bg, (50, start_y + i * 28), _shape(fa_text), color)
+            font.render_to(self._static_bg, (350, start_y + i * 28), en_text, color)
 
     def init_tello(self):
         """مقداردهی پهپاد تلو"""
@@ -185,35 +336,38 @@ class TelloController:
                 sys.exit(1)
 
     def draw_ui(self):
-        """نمایش رابط کاربری با وضعیت فعلی"""
+        """
+        نمایش رابط کاربری با وضعیت فعلی
         
-        # پاک کردن صفحه
-        self.screen.fill((20, 25, 40))
+        لیست ناحیه‌هایی که باید روی صفحه به‌روز شوند برگردانده می‌شود
+        (ویجت‌های این فریم به همراه ویجت‌های فریم قبل که باید پاک شوند).
+        """
         
-        # عنوان اصلی
-        title_text = "کنترل کننده پهپاد تلو"
-        title_surface = render_persian_text(self.font_title, title_text, (255, 255, 255))
-        title_rect = title_surface.get_rect(center=(450, 50))
-        self.screen.blit(title_surface, title_rect)
+        # اگر هیچ مقدار نمایش داده شده‌ای تغییر نکرده باشد رسم لازم نیست
+        state = (self.connected, self.is_flying, self.battery_level, self.pressed_mask,
+                 self.for_back_velocity, self.left_right_velocity,
+                 self.up_down_velocity, self.yaw_velocity)
+        if state == self._last_state:
+            return []
+        self._last_state = state
         
-        subtitle_text = "Tello Drone Controller"
-        subtitle_surface = render_persian_text(self.font_medium, subtitle_text, (200, 200, 200))
-        subtitle_rect = subtitle_surface.get_rect(center=(450, 85))
-        self.screen.blit(subtitle_surface, subtitle_rect)
+        # همه blitهای فریم جمع‌آوری و در انتها با یک فراخوانی Surface.blits انجام می‌شوند؛
+        # اولین مورد پس‌زمینه ثابت است (پاک کردن صفحه، عنوان و دستورالعمل‌ها)
+        blit_list = [(self._static_bg, (0, 0))]
         
         # وضعیت اتصال
         status_color = (50, 255, 50) if self.connected else (255, 100, 100)
         status_text = "🟢 متصل" if self.connected else "🔴 قطع شده"
-        status_surface = render_persian_text(self.font_large, status_text, status_color)
+        status_surface = render_persian_text(self.font_large, status_text, status_color, self._text_cache)
         status_rect = status_surface.get_rect(center=(450, 130))
-        self.screen.blit(status_surface, status_rect)
+        blit_list.append((status_surface, status_rect))
         
         # وضعیت پرواز
         flight_color = (255, 255, 50) if self.is_flying else (150, 150, 150)
         flight_text = "🚁 در حال پرواز" if self.is_flying else "🛬 روی زمین"
-        flight_surface = render_persian_text(self.font_large, flight_text, flight_color)
+        flight_surface = render_persian_text(self.font_large, flight_text, flight_color, self._text_cache)
         flight_rect = flight_surface.get_rect(center=(450, 170))
-        self.screen.blit(flight_surface, flight_rect)
+        blit_list.append((flight_surface, flight_rect))
         
         # سطح باتری
         if self.battery_level < 20:
@@ -226,187 +380,214 @@ class TelloController:
             battery_color = (50, 255, 50)
             battery_icon = "🟢"
             
-        battery_text = f"{battery_icon} باتری: {self.battery_level}%"
-        battery_surface = render_persian_text(self.font_large, battery_text, battery_color)
-
-        battery_rect = battery_surface.get_rect(center=(450, 210))
-        self.screen.blit(battery_surface, battery_rect)
+        # برچسب فارسی (از کش) و عدد (بدون bidi) جداگانه؛ عدد سمت چپ مانند ترتیب نمایش RTL
+        label_surface = render_persian_text(self.font_large, f"{battery_icon} باتری:", battery_color, self._text_cache)
+        value_surface = render_persian_text(self.font_large, f"{self.battery_level}% ", battery_color, self._text_cache)
+        battery_rect = pygame.Rect(0, 0, value_surface.get_width() + label_surface.get_width(),
+                                   label_surface.get_height())
+        battery_rect.center = (450, 210)
+        blit_list.append((value_surface, battery_rect.topleft))
+        blit_list.append((label_surface, (battery_rect.x + value_surface.get_width(), battery_rect.y)))
         
         # سرعت‌های فعلی
         vel_start_y = 270
-        vel_texts = [
-            ("جلو/عقب:", self.for_back_velocity),
-            ("چپ/راست:", self.left_right_velocity), 
-            ("بالا/پایین:", self.up_down_velocity),
-            ("چرخش:", self.yaw_velocity)
-        ]
-        
-        for i, (label, value) in enumerate(vel_texts):
-            color = (100, 255, 255) if abs(value) > 0 else (150, 150, 150)
-            text = f"{label} {value:4d}"
-
-            vel_surface = render_persian_text(self.font_small,text, color)
-            self.screen.blit(vel_surface, (300, vel_start_y + i * 30))
-        
-        # دستورالعمل‌ها
-        instructions_fa = [
-            "دستورالعمل کنترل:",
-            "T - برخاستن (Takeoff)",
-            "L - فرود آمدن (Landing)", 
-            "W/S - جلو/عقب",
-            "A/D - چپ/راست",
-            "↑/↓ - بالا/پایین",
-            "←/→ - چرخش چپ/راست",
-            "ESC - توقف اضطراری"
-        ]
-        
-        instructions_en = [
-            "CONTROLS:",
-            "T - Takeoff",
-            "L - Land",
-            "W/S - Forward/Back", 
-            "A/D - Left/Right",
-            "↑/↓ - Up/Down",
-            "←/→ - Rotate Left/Right", 
-            "ESC - Emergency Stop"
-        ]
-        
-        # نمایش دستورالعمل‌ها (فارسی و انگلیسی)
-        start_y = 420
-        for i, (fa_text, en_text) in enumerate(zip(instructions_fa, instructions_en)):
-            if i == 0:  # عنوان
-                color = (255, 255, 255)
-                font = self.font_medium
-            else:
-                color = (200, 200, 200)
-                font = self.font_small
-                
-            # متن فارسی
-            fa_surface = render_persian_text(font,fa_text, color)
-            self.screen.blit(fa_surface, (50, start_y + i * 28))
-            
-            # متن انگلیسی
-            en_surface = font.render(en_text, True, color)
-            self.screen.blit(en_surface, (350, start_y + i * 28))
-        
-        # کلیدهای فشرده شده
-        if self.pressed_keys:
-            pressed_text = f"کلیدهای فعال: {sorted(self.pressed_keys)}"
-            pressed_surface = render_persian_text(self.font_small,pressed_text, (255, 255, 100))
-            self.screen.blit(pressed_surface, (50, 650))
+        vel_values = (self.for_back_velocity, self.left_right_velocity,
+                      self.up_down_velocity, self.yaw_velocity)
+        
+        # Surfaceها فقط وقتی سرعتی تغییر کرده باشد دوباره انتخاب می‌شوند
+        if vel_values != self._last_vel:
+            self._vel_surfs = []
+            for label, value in zip(VEL_LABELS, vel_values):
+                color = (100, 255, 255) if value else (150, 150, 150)
+                # عدد (بدون bidi) و برچسب فارسی (از کش) جداگانه رندر می‌شوند
+                self._vel_surfs.append((
+                    render_persian_text(self.font_small, f"{value:4d} ", color, self._text_cache),
+                    render_persian_text(self.font_small, label, color, self._text_cache),
+                ))
+            self._last_vel = vel_values
+        
+        for i, (value_surface, label_surface) in enumerate(self._vel_surfs):
+            y = vel_start_y + i * 30
+            # عدد سمت چپ و برچسب سمت راست آن، مانند ترتیب نمایش RTL
+            blit_list.append((value_surface, (300, y)))
+            blit_list.append((label_surface, (300 + value_surface.get_width(), y)))
+        
+        # کلیدهای فشرده شده (فقط در صورت تغییر ماسک دوباره ساخته می‌شود)
+        if self.pressed_mask:
+            if self._pressed_surface[0] != self.pressed_mask:
+                # فقط نام کلیدها (ASCII) دوباره رندر می‌شود؛ برچسب فارسی از کش می‌آید
+                names = ', '.join(label for i, label in enumerate(KEY_LABELS) if self.pressed_mask >> i & 1)
+                self._pressed_surface = (self.pressed_mask,
+                                         render_persian_text(self.font_small, f"{names} ", (255, 255, 100)))
+            names_surface = self._pressed_surface[1]
+            label_surface = render_persian_text(self.font_small, "کلیدهای فعال:", (255, 255, 100), self._text_cache)
+            blit_list.append((names_surface, (50, 650)))
+            blit_list.append((label_surface, (50 + names_surface.get_width(), 650)))
         
         # هشدارهای ایمنی
         warnings_y = 680
         if not self.connected:
             warning_text = "⚠️ اتصال برقرار نیست - کنترل غیرفعال"
-            warning_surface = render_persian_text(self.font_small, warning_text, (255, 100, 100))
-            self.screen.blit(warning_surface, (50, warnings_y))
+            warning_surface = render_persian_text(self.font_small, warning_text, (255, 100, 100), self._text_cache)
+            blit_list.append((warning_surface, (50, warnings_y)))
         elif self.battery_level < 20:
             warning_text = "⚠️ باتری کم - هرچه زودتر فرود آمدن توصیه می‌شود"
-            warning_surface = render_persian_text(self.font_small, warning_text, (255, 100, 100))
-            self.screen.blit(warning_surface, (50, warnings_y))
+            warning_surface = render_persian_text(self.font_small, warning_text, (255, 100, 100), self._text_cache)
+            blit_list.append((warning_surface, (50, warnings_y)))
+        
+        # ناحیه‌های ویجت‌ها (بدون پس‌زمینه) برای به‌روزرسانی صفحه
+        rects = self.screen.blits(blit_list)[1:]
+        dirty = rects + self._last_rects
+        self._last_rects = rects
+        return dirty
 
     def handle_key_down(self, key):
         """مدیریت فشردن کلیدها"""
         
-        # افزودن نام کلید به لیست کلیدهای فشرده شده
-        key_name = pygame.key.name(key).upper()
-        self.pressed_keys.add(key_name)
-        
         # برخاستن
-        if key == pygame.K_t and not self.is_flying and self.connected:
+        if key == pygame.K_t and not self.is_flying and self.connected and not self._command_pending:
             if self.battery_level < 10:
                 to_rtl("❌ باتری خیلی کم است! نمی‌توان پرواز کرد")
                 return
                 
             to_rtl("🚁 در حال برخاستن...")
-            try:
-                self.tello.takeoff()
-                self.is_flying = True
-                to_rtl("✅ برخاستن موفق")
-            except Exception as e:
-                to_rtl(f"❌ خطا در برخاستن: {e}")
+            self._command_pending = True
+            self._command_queue.put(('takeoff',))
                 
         # فرود آمدن
-        elif key == pygame.K_l and self.is_flying:
+        elif key == pygame.K_l and self.is_flying and not self._command_pending:
             to_rtl("🛬 در حال فرود...")
-            try:
-                self.tello.land()
-                self.is_flying = False
-                to_rtl("✅ فرود موفق")
-            except Exception as e:
-                to_rtl(f"❌ خطا در فرود: {e}")
+            self._command_pending = True
+            self._command_queue.put(('land',))
 
-        # کنترل‌های حرکت - فقط در صورت پرواز
-        elif self.is_flying and self.connected:
-            if key == pygame.K_w:
-                self.for_back_velocity = SPEED
-                to_rtl("➡️ حرکت جلو")
-            elif key == pygame.K_s:
-                self.for_back_velocity = -SPEED
-                to_rtl("⬅️ حرکت عقب")
-            elif key == pygame.K_a:
-                self.left_right_velocity = -SPEED
-                to_rtl("⬅️ حرکت چپ")
-            elif key == pygame.K_d:
-                self.left_right_velocity = SPEED
-                to_rtl("➡️ حرکت راست")
-            elif key == pygame.K_UP:
-                self.up_down_velocity = SPEED
-                to_rtl("⬆️ حرکت بالا")
-            elif key == pygame.K_DOWN:
-                self.up_down_velocity = -SPEED
-                to_rtl("⬇️ حرکت پایین")
-            elif key == pygame.K_LEFT:
-                self.yaw_velocity = -SPEED
-                to_rtl("↩️ چرخش چپ")
-            elif key == pygame.K_RIGHT:
-                self.yaw_velocity = SPEED
-                to_rtl("↪️ چرخش راست")
-        
         # توقف اضطراری
         elif key == pygame.K_ESCAPE:
             to_rtl("🚨 توقف اضطراری فعال شد!")
-            if self.is_flying and self.connected:
+            # برخاستنی که هنوز تمام نشده هم باید متوقف شود
+            if (self.is_flying or self._command_pending) and self.connected:
+                self._emergency.set()
+                # مستقیم و بدون صف: emergency منتظر پاسخ نمی‌ماند و نباید
+                # پشت برخاستن/فرود چند ثانیه‌ای در رشته پهپاد منتظر بماند
                 try:
                     self.tello.emergency()
-                    self.is_flying = False
                     to_rtl("✅ دستور اضطراری ارسال شد")
                 except Exception as e:
                     to_rtl(f"❌ خطا در دستور اضطراری: {e}")
+                self.is_flying = False
+                self._command_pending = False
             self.send_rc = False
 
-    def handle_key_up(self, key):
-        """مدیریت رها کردن کلیدها"""
+    def update_keys(self):
+        """
+        خواندن وضعیت فعلی کیبورد و محاسبه سرعت‌ها
+        
+        سرعت‌ها در هر دور از روی کلیدهای نگه داشته شده محاسبه می‌شوند، پس اگر
+        رویداد KEYUP از دست برود (مثلاً با خروج فوکوس از پنجره) پهپاد به حرکت ادامه نمی‌دهد.
+        """
+        
+        keys = pygame.key.get_pressed()
         
-        # حذف نام کلید از لیست کلیدهای فشرده شده
-        key_name = pygame.key.name(key).upper()
-        self.pressed_keys.discard(key_name)
+        # کلیدهای فشرده شده برای نمایش
+        mask = 0
+        for key, bit in KEY_BITS.items():
+            if keys[key]:
+                mask |= 1 << bit
+        self.pressed_mask = mask
         
-        # توقف حرکات
-        if key in (pygame.K_w, pygame.K_s):
-            self.for_back_velocity = 0
-        elif key in (pygame.K_a, pygame.K_d):
-            self.left_right_velocity = 0
-        elif key in (pygame.K_UP, pygame.K_DOWN):
-            self.up_down_velocity = 0
-        elif key in (pygame.K_LEFT, pygame.K_RIGHT):
-            self.yaw_velocity = 0
+        # کنترل‌های حرکت - فقط در صورت پرواز
+        speed = SPEED if self.is_flying and self.connected else 0
+        for attr, positive, negative in self._AXES:
+            setattr(self, attr, speed * (keys[positive] - keys[negative]))
 
-    def update_battery(self):
-        """به‌روزرسانی سطح باتری"""
+    def _drone_worker(self):
+        """
+        رشته ارتباط با پهپاد
         
-        if self.connected:
+        دستورات حلقه اصلی را از صف اجرا می‌کند و سطح باتری را به صورت دوره‌ای می‌خواند.
+        نتایج به صورت (نوع، مقدار) در صف اطلاعات قرار می‌گیرند.
+        """
+        
+        next_battery = time.monotonic() + BATTERY_INTERVAL
+        while True:
+            try:
+                command = self._command_queue.get(timeout=max(0.0, next_battery - time.monotonic()))
+            except queue.Empty:
+                command = None
+            
+            if command is not None:
+                if command[0] == 'quit':
+                    break
+                # دستورات مانده در صف پس از توقف اضطراری دور ریخته می‌شوند
+                if not self._emergency.is_set():
+                    self._execute(command)
+            
+            if time.monotonic() >= next_battery:
+                next_battery = time.monotonic() + BATTERY_INTERVAL
+                try:
+                    self._telemetry_queue.put(('battery', self.tello.get_battery()))
+                except Exception as e:
+                    to_rtl(f"خطا در خواندن باتری: {e}")
+
+    def _execute(self, command):
+        """اجرای یک دستور پهپاد (فقط در رشته ارتباط با پهپاد)"""
+        
+        name = command[0]
+        if name == 'rc':
+            try:
+                self.tello.send_rc_control(*command[1:])
+            except Exception as e:
+                to_rtl(f"خطا در ارسال دستور: {e}")
+                self._telemetry_queue.put(('connected', False))
+        
+        elif name == 'takeoff':
+            try:
+                self.tello.takeoff()
+                self._telemetry_queue.put(('flying', True))
+                to_rtl("✅ برخاستن موفق")
+            except Exception as e:
+                self._telemetry_queue.put(('flying', False))
+                to_rtl(f"❌ خطا در برخاستن: {e}")
+        
+        elif name == 'land':
             try:
-                self.battery_level = self.tello.get_battery()
+                self.tello.land()
+                self._telemetry_queue.put(('flying', False))
+                to_rtl("✅ فرود موفق")
             except Exception as e:
-                to_rtl(f"خطا در خواندن باتری: {e}")
+                self._telemetry_queue.put(('flying', True))
+                to_rtl(f"❌ خطا در فرود: {e}")
+
+    def poll_telemetry(self):
+        """اعمال اطلاعات دریافتی از رشته ارتباط با پهپاد (بدون انتظار)"""
+        
+        try:
+            while True:
+                name, value = self._telemetry_queue.get_nowait()
+                if name == 'battery':
+                    self.battery_level = value
+                elif name == 'flying':
+                    # برخاستنی که پس از توقف اضطراری تمام شده موتورها را روشن نگه نداشته است
+                    self.is_flying = value and not self._emergency.is_set()
+                    self._command_pending = False
+                elif name == 'connected':
+                    self.connected = value
+        except queue.Empty:
+            pass
 
     def run(self):
         """حلقه اصلی برنامه"""
         
-        clock = pygame.time.Clock()
-        battery_update_counter = 0
+        # زمان‌بندی مستقل برای ارسال دستورات کنترل و رسم فریم‌ها
+        frame_interval = 1 / FPS
+        next_rc = next_frame = time.monotonic()
+        last_sent = (0, 0, 0, 0)
+        last_sent_time = 0.0
+        
+        # جدول توزیع رویدادهای کیبورد به جای زنجیره if/elif
+        # (فقط کلیدهای تک‌ضرب؛ کلیدهای حرکت در update_keys خوانده می‌شوند)
+        key_handlers = {
+            pygame.KEYDOWN: self.handle_key_down,
+        }
         
         to_rtl("✅ کنترل کننده فعال شد")
         to_rtl("📺 پنجره نمایش باید قابل مشاهده باشد")
@@ -417,40 +598,49 @@ class TelloController:
             to_rtl("🎮 آماده کنترل!")
         
         while self.send_rc:
+            # تا رسیدن رویداد بعدی یا نزدیک‌ترین موعد (فریم بعدی یا ارسال دستور بعدی) صبر می‌کنیم
+            deadline = next_frame
+            if self.is_flying and self.connected:
+                deadline = min(deadline, next_rc)
+            timeout = int((deadline - time.monotonic()) * 1000)
+            events = []
+            if timeout > 0:
+                event = pygame.event.wait(timeout)
+                if event.type != pygame.NOEVENT:
+                    events.append(event)
+            # دریافت یکجای باقی رویدادهای صف
+            events += pygame.event.get()
+            
             # مدیریت رویدادهای pygame
-            for event in pygame.event.get():
+            for event in events:
                 if event.type == pygame.QUIT:
                     self.send_rc = False
-                elif event.type == pygame.KEYDOWN:
-                    self.handle_key_down(event.key)
-                elif event.type == pygame.KEYUP:
-                    self.handle_key_up(event.key)
+                else:
+                    handler = key_handlers.get(event.type)
+                    if handler is not None:
+                        handler(event.key)
+            self.update_keys()
             
-            # ارسال دستورات کنترل از راه دور
-            if self.is_flying and self.connected:
-                try:
-                    self.tello.send_rc_control(
-                        self.left_right_velocity,
-                        self.for_back_velocity, 
-                        self.up_down_velocity,
-                        self.yaw_velocity
-                    )
-                except Exception as e:
-                    to_rtl(f"خطا در ارسال دستور: {e}")
-                    self.connected = False
+            # ارسال دستورات کنترل از راه دور با نرخ ثابت (مستقل از نرخ فریم)،
+            # فقط وقتی سرعت‌ها تغییر کرده‌اند یا برای زنده نگه داشتن اتصال
+            now = time.monotonic()
+            # (در حین برخاستن/فرود دستور کنترل فرستاده نمی‌شود)
+            if self.is_flying and self.connected and not self._command_pending and now >= next_rc:
+                next_rc = max(next_rc + RC_INTERVAL, now)
+                velocities = (self.left_right_velocity, self.for_back_velocity,
+                              self.up_down_velocity, self.yaw_velocity)
+                if velocities != last_sent or now - last_sent_time >= RC_KEEPALIVE:
+                    self._command_queue.put(('rc',) + velocities)
+                    last_sent = velocities
+                    last_sent_time = now
             
-            # به‌روزرسانی باتری (هر 3 ثانیه)
-            battery_update_counter += 1
-            if battery_update_counter >= (FPS * 3):  # هر 3 ثانیه
-                self.update_battery()
-                battery_update_counter = 0
+            # دریافت سطح باتری و نتیجه دستورات از رشته پس‌زمینه
+            self.poll_telemetry()
             
-            # به‌روزرسانی نمایش
-            self.draw_ui()
-            pygame.display.flip()
-            
-            # محدود کردن FPS
-            clock.tick(FPS)
+            # به‌روزرسانی نمایش (فقط ناحیه‌های تغییر کرده) با حداکثر FPS فریم در ثانیه
+            if now >= next_frame:
+                next_frame = max(next_frame + frame_interval, now)
+                pygame.display.update(self.draw_ui())
         
         # پاکسازی قبل از خروج
         self.cleanup()
@@ -460,6 +650,13 @@ class TelloController:
         
         to_rtl("🧹 در حال پاکسازی...")
         
+        # توقف رشته ارتباط با پهپاد پس از اجرای دستورات باقی‌مانده؛ اطلاعات آخر
+        # (مثلاً برخاستنی که هنوز تمام نشده بود) پیش از تصمیم برای فرود نهایی اعمال می‌شود
+        if self._drone_thread is not None:
+            self._command_queue.put(('quit',))
+            self._drone_thread.join(timeout=CONNECTION_TIMEOUT)
+            self.poll_telemetry()
+        
         # اگر پهپاد در حال پرواز است، فرود آمدن
         if self.is_flying and self.connected:
             to_rtl("🛬 فرود نهایی...")
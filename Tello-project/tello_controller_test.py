@@ -1,18 +1,28 @@
 #!/usr/bin/env python3
 import pygame
 import time
-import os
-import sys
+import threading
+import logging
+from collections import deque
+
+from ui_loop import InputUI
+
+# Per-key and per-command diagnostics go here instead of stdout (enable with --verbose)
+logger = logging.getLogger(__name__)
 
 # Mock Tello class for testing without actual hardware
 class MockTello:
     """
     Mock Tello class that simulates drone behavior for testing purposes.
     """
-    def __init__(self):
+    __slots__ = ('battery', 'connected', 'flying', 'verbose')
+
+    def __init__(self, verbose=False):
         self.battery = 85
         self.connected = False
         self.flying = False
+        # Print every RC command (up to RC_RATE lines per second)
+        self.verbose = verbose
         print("Mock Tello initialized")
     
     def connect(self):
@@ -39,7 +49,7 @@ class MockTello:
     
     def send_rc_control(self, lr, fb, ud, yaw):
         # Only print if there's actual movement to avoid spam
-        if lr != 0 or fb != 0 or ud != 0 or yaw != 0:
+        if __debug__ and self.verbose and (lr != 0 or fb != 0 or ud != 0 or yaw != 0):
             print(f"Mock RC: LR:{lr:3d} FB:{fb:3d} UD:{ud:3d} YAW:{yaw:3d}")
     
     def emergency(self):
@@ -56,51 +66,50 @@ except ImportError:
     Tello = MockTello
     USE_REAL_TELLO = False
 
-# Speed of the drone
-S = 60
-# Control intervals
-FPS = 60  # Reduced for better performance
+# RC commands sent per second by the RC thread
+RC_RATE = 50
+# Seconds between battery reads by the battery thread
+BATTERY_INTERVAL = 5
+# Battery level colors (low, medium, high)
+BATTERY_COLORS = ((255, 0, 0), (255, 255, 0), (0, 255, 0))
 
-class TelloController:
+# Control instructions shown on screen
+INSTRUCTIONS = [
+    "CONTROLS:",
+    "T - Takeoff",
+    "L - Land",
+    "W/S - Forward/Back",
+    "A/D - Left/Right",
+    "↑/↓ - Up/Down",
+    "←/→ - Rotate Left/Right",
+    "ESC - Emergency Stop"
+]
+
+class TelloController(InputUI):
     """
     A class to control the Tello drone using keyboard input.
     Enhanced for macOS compatibility and testing without hardware.
     """
+    # Fixed attribute layout: the flight state is read every frame
+    __slots__ = (
+        'tello', 'using_mock', 'speed', 'is_flying', 'battery_level', 'connected',
+        '_cmd_queue', '_stop_event', '_cmd_ready', '_rc_thread',
+        '_battery_thread',
+    )
 
     def __init__(self, use_mock=False):
-        # Force Pygame to use specific video driver on macOS
-        if sys.platform == "darwin":  # macOS
-            os.environ['SDL_VIDEODRIVER'] = 'cocoa'
-        
-        # Initialize Pygame
-        pygame.init()
-        pygame.mixer.quit()  # Disable audio to prevent issues
+        super().__init__((800, 600),
+                         "Tello Controller - Press T for takeoff, L for land, ESC to quit",
+                         "Tello Drone Controller", INSTRUCTIONS,
+                         on_rc=self._queue_rc)
         
-        # Set up display with specific flags for macOS
-        width, height = 800, 600
-        flags = pygame.DOUBLEBUF | pygame.HWSURFACE
-        self.screen = pygame.display.set_mode((width, height), flags)
-        pygame.display.set_caption("Tello Controller - Press T for takeoff, L for land, ESC to quit")
-        
-        # Fill screen with a dark color initially
-        self.screen.fill((30, 30, 50))
-        pygame.display.flip()
-        
-        # macOS specific: Force window to front
-        if sys.platform == "darwin":
-            try:
-                os.system('''osascript -e 'tell application "System Events" to set frontmost of first process whose name is "Python" to true' ''')
-            except:
-                pass  # Ignore if AppleScript fails
-        
-        # Initialize fonts for text display
-        self.font_large = pygame.font.Font(None, 36)
-        self.font_medium = pygame.font.Font(None, 24)
-        self.font_small = pygame.font.Font(None, 18)
+        # Glyph atlas per battery color, so the percentage is never rasterized again
+        for color in BATTERY_COLORS:
+            self.add_atlas(self.font_medium, color)
         
         # Initialize Tello (real or mock)
         if use_mock or not USE_REAL_TELLO:
-            self.tello = MockTello()
+            self.tello = MockTello(verbose=logger.isEnabledFor(logging.DEBUG))
             self.using_mock = True
         else:
             try:
@@ -108,29 +117,31 @@ class TelloController:
                 self.using_mock = False
             except Exception as e:
                 print(f"Failed to initialize real Tello, using mock: {e}")
-                self.tello = MockTello()
+                self.tello = MockTello(verbose=logger.isEnabledFor(logging.DEBUG))
                 self.using_mock = True
         
-        # Drone velocities
-        self.for_back_velocity = 0
-        self.left_right_velocity = 0
-        self.up_down_velocity = 0
-        self.yaw_velocity = 0
         self.speed = 100
 
         # Flight state
         self.is_flying = False
-        self.send_rc = True
         self.battery_level = 0
         
         # Connection status
         self.connected = False
         
-        # Keys currently pressed (for visual feedback)
-        self.pressed_keys = set()
+        # Latest RC command (older ones are dropped) and the thread sending it
+        self._cmd_queue = deque(maxlen=1)
+        self._stop_event = threading.Event()
+        # Set when a key event queues a command, so it is sent without waiting for the next tick
+        self._cmd_ready = threading.Event()
+        self._rc_thread = threading.Thread(target=self._rc_worker, daemon=True)
+        # Battery is refreshed in the background so get_battery() never blocks rendering
+        self._battery_thread = threading.Thread(target=self._battery_worker, daemon=True)
         
         # Initialize connection
         self.initialize_connection()
+        self._rc_thread.start()
+        self._battery_thread.start()
         
         # Start main loop
         self.run()
@@ -147,205 +158,147 @@ class TelloController:
         except Exception as e:
             print(f"Connection failed: {e}")
             self.connected = False
+        self._dirty = True
 
-    def draw_ui(self):
-        """Draw the user interface with current status and controls."""
-        # Clear screen
-        self.screen.fill((30, 30, 50))
+    def _rc_worker(self):
+        """
+        Send the latest queued RC command at RC_RATE, independent of the frame rate.
         
-        # Title
-        title_text = "Tello Drone Controller"
-        title_surface = self.font_large.render(title_text, True, (255, 255, 255))
-        title_rect = title_surface.get_rect(center=(400, 50))
-        self.screen.blit(title_surface, title_rect)
+        Commands queued by a key event are sent as soon as they arrive.
+        """
+        period = 1 / RC_RATE
+        while not self._stop_event.is_set():
+            self._cmd_ready.wait(period)
+            self._cmd_ready.clear()
+            try:
+                input_stamp, command = self._cmd_queue.pop()
+            except IndexError:
+                continue
+            try:
+                self.tello.send_rc_control(*command)
+            except Exception as e:
+                print(f"RC command failed: {e}")
+                continue
+            if input_stamp is not None:
+                logger.debug("RC %s sent %d ms after key event",
+                             command, pygame.time.get_ticks() - input_stamp)
+
+    def _battery_worker(self):
+        """Read the battery level every BATTERY_INTERVAL seconds and mark the UI dirty on change."""
+        while not self._stop_event.wait(BATTERY_INTERVAL):
+            if not self.connected:
+                continue
+            try:
+                battery_level = self.tello.get_battery()
+            except Exception as e:
+                print(f"Battery read failed: {e}")
+                continue
+            # No lock: battery_level and _dirty are single attribute writes (atomic under the GIL),
+            # and the main loop clears _dirty before drawing, so a change is at worst drawn one frame late
+            if battery_level != self.battery_level:
+                self.battery_level = battery_level
+                self._dirty = True
+
+    def _queue_rc(self, lr, fb, ud, yaw):
+        """Queue RC control commands for the RC thread (called once per frame)."""
+        if self.is_flying and self.connected:
+            self._cmd_queue.append((self.input_stamp, (lr, fb, ud, yaw)))
+            if self.input_stamp is not None:
+                self._cmd_ready.set()
+
+    def draw_widgets(self):
+        """Draw the connection, flight and battery status above the shared widgets."""
+        rects = []
         
         # Connection status
         status_color = (0, 255, 0) if self.connected else (255, 100, 100)
         status_text = "CONNECTED" if self.connected else "DISCONNECTED"
         if self.using_mock:
             status_text += " (MOCK MODE)"
-        status_surface = self.font_medium.render(status_text, True, status_color)
+        status_surface = self._render(self.font_medium, status_text, status_color)
         status_rect = status_surface.get_rect(center=(400, 90))
-        self.screen.blit(status_surface, status_rect)
+        rects.append(self.screen.blit(status_surface, status_rect))
         
         # Flight status
         flight_color = (255, 255, 0) if self.is_flying else (150, 150, 150)
         flight_text = "FLYING" if self.is_flying else "LANDED"
-        flight_surface = self.font_medium.render(flight_text, True, flight_color)
+        flight_surface = self._render(self.font_medium, flight_text, flight_color)
         flight_rect = flight_surface.get_rect(center=(400, 120))
-        self.screen.blit(flight_surface, flight_rect)
+        rects.append(self.screen.blit(flight_surface, flight_rect))
         
         # Battery level
-        battery_color = (255, 0, 0) if self.battery_level < 20 else (255, 255, 0) if self.battery_level < 50 else (0, 255, 0)
-        battery_text = f"Battery: {self.battery_level}%"
-        battery_surface = self.font_medium.render(battery_text, True, battery_color)
-        battery_rect = battery_surface.get_rect(center=(400, 150))
-        self.screen.blit(battery_surface, battery_rect)
-        
-        # Current velocities
-        vel_y = 200
-        vel_texts = [
-            f"Forward/Back: {self.for_back_velocity:4d}",
-            f"Left/Right:   {self.left_right_velocity:4d}",
-            f"Up/Down:      {self.up_down_velocity:4d}",
-            f"Yaw:          {self.yaw_velocity:4d}"
-        ]
+        low, medium, high = BATTERY_COLORS
+        battery_color = low if self.battery_level < 20 else medium if self.battery_level < 50 else high
+        # Static label from the text cache, percentage from the glyph atlas
+        battery_label = self._render(self.font_medium, "Battery: ", battery_color)
+        battery_value = f"{self.battery_level}%"
+        battery_width = battery_label.get_width() + self.text_width(battery_value, self.font_medium, battery_color)
+        battery_rect = battery_label.get_rect(center=(400, 150))
+        battery_rect.x = 400 - battery_width // 2
+        rects.append(self.screen.blit(battery_label, battery_rect))
+        rects.append(self.blit_text(battery_value, battery_rect.topright, self.font_medium, battery_color))
         
-        for i, text in enumerate(vel_texts):
-            color = (255, 255, 0) if any(abs(v) > 0 for v in [self.for_back_velocity, self.left_right_velocity, self.up_down_velocity, self.yaw_velocity]) else (200, 200, 200)
-            if i == 0 and abs(self.for_back_velocity) > 0:
-                color = (0, 255, 255)
-            elif i == 1 and abs(self.left_right_velocity) > 0:
-                color = (0, 255, 255)
-            elif i == 2 and abs(self.up_down_velocity) > 0:
-                color = (0, 255, 255)
-            elif i == 3 and abs(self.yaw_velocity) > 0:
-                color = (0, 255, 255)
-            else:
-                color = (150, 150, 150)
-                
-            vel_surface = self.font_medium.render(text, True, color)
-            self.screen.blit(vel_surface, (250, vel_y + i * 30))
-        
-        # Control instructions
-        instructions = [
-            "CONTROLS:",
-            "T - Takeoff",
-            "L - Land",
-            "W/S - Forward/Back",
-            "A/D - Left/Right", 
-            "↑/↓ - Up/Down",
-            "←/→ - Rotate Left/Right",
-            "ESC - Emergency Stop"
-        ]
-        
-        start_y = 350
-        for i, instruction in enumerate(instructions):
-            color = (255, 255, 255) if i == 0 else (200, 200, 200)
-            font = self.font_medium if i == 0 else self.font_small
-            instruction_surface = font.render(instruction, True, color)
-            self.screen.blit(instruction_surface, (50, start_y + i * 25))
-        
-        # Currently pressed keys
-        if self.pressed_keys:
-            pressed_text = f"Pressed: {', '.join(sorted(self.pressed_keys))}"
-            pressed_surface = self.font_small.render(pressed_text, True, (255, 255, 0))
-            self.screen.blit(pressed_surface, (50, 550))
+        return rects + super().draw_widgets()
 
     def run(self):
         """Main loop to handle events and send commands."""
-        clock = pygame.time.Clock()
-        
         print("Controller started. Window should be visible.")
         print("Press T for takeoff, L for land, ESC to quit.")
-        
-        while self.send_rc:
-            # Handle Pygame events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.send_rc = False
-                elif event.type == pygame.KEYDOWN:
-                    self.handle_key_down(event.key)
-                elif event.type == pygame.KEYUP:
-                    self.handle_key_up(event.key)
-            
-            # Send RC control commands
-            if self.is_flying and self.connected:
-                self.tello.send_rc_control(self.left_right_velocity,
-                                           self.for_back_velocity,
-                                           self.up_down_velocity,
-                                           self.yaw_velocity)
-            
-            # Update display
-            self.draw_ui()
-            pygame.display.flip()
+        super().run()
 
-            # Limit the loop to our desired FPS
-            clock.tick(FPS)
-            
-        # Cleanup before exit
-        self.cleanup()
-
-    def handle_key_down(self, key):
-        """Handles key press events."""
-        # Convert key to string for display
-        key_name = pygame.key.name(key).upper()
-        self.pressed_keys.add(key_name)
-        
-        if key == pygame.K_t and not self.is_flying and self.connected:
+    def takeoff(self):
+        """T key: take off if landed and connected."""
+        if not self.is_flying and self.connected:
             print("Taking off...")
             try:
                 self.tello.takeoff()
                 self.is_flying = True
             except Exception as e:
                 print(f"Takeoff failed: {e}")
-                
-        elif key == pygame.K_l and self.is_flying:
+
+    def land(self):
+        """L key: land if flying."""
+        if self.is_flying:
             print("Landing...")
+            self._cmd_queue.clear()
             try:
                 self.tello.land()
                 self.is_flying = False
             except Exception as e:
                 print(f"Landing failed: {e}")
 
-        # Movement controls
-        elif key == pygame.K_w:
-            self.for_back_velocity = S
-            print("Moving forward")
-        elif key == pygame.K_s:
-            self.for_back_velocity = -S
-            print("Moving backward")
-        elif key == pygame.K_a:
-            self.left_right_velocity = -S
-            print("Moving left")
-        elif key == pygame.K_d:
-            self.left_right_velocity = S
-            print("Moving right")
-        elif key == pygame.K_UP:
-            self.up_down_velocity = S
-            print("Moving up")
-        elif key == pygame.K_DOWN:
-            self.up_down_velocity = -S
-            print("Moving down")
-        elif key == pygame.K_LEFT:
-            self.yaw_velocity = -S
-            print("Rotating left")
-        elif key == pygame.K_RIGHT:
-            self.yaw_velocity = S
-            print("Rotating right")
-        
-        # Emergency stop
-        elif key == pygame.K_ESCAPE:
-            print("EMERGENCY STOP - Exiting!")
-            if self.is_flying:
-                try:
-                    self.tello.emergency()
-                except Exception as e:
-                    print(f"Emergency command failed: {e}")
-            self.send_rc = False
+    def emergency_stop(self):
+        """ESC key: stop the motors if flying and exit."""
+        print("EMERGENCY STOP - Exiting!")
+        if self.is_flying:
+            try:
+                self.tello.emergency()
+            except Exception as e:
+                print(f"Emergency command failed: {e}")
+        self.running = False
 
-    def handle_key_up(self, key):
-        """Handles key release events to stop movement."""
-        # Remove key from pressed keys
-        key_name = pygame.key.name(key).upper()
-        self.pressed_keys.discard(key_name)
-        
-        if key in (pygame.K_w, pygame.K_s):
-            self.for_back_velocity = 0
-            print("Stopped forward/back movement")
-        elif key in (pygame.K_a, pygame.K_d):
-            self.left_right_velocity = 0
-            print("Stopped left/right movement")
-        elif key in (pygame.K_UP, pygame.K_DOWN):
-            self.up_down_velocity = 0
-            print("Stopped up/down movement")
-        elif key in (pygame.K_LEFT, pygame.K_RIGHT):
-            self.yaw_velocity = 0
-            print("Stopped rotation")
+    # Flight keys and their handlers (movement keys are handled by InputUI)
+    KEY_ACTIONS = {
+        pygame.K_t: takeoff,
+        pygame.K_l: land,
+        pygame.K_ESCAPE: emergency_stop,
+    }
+
+    def handle_key_down(self, key):
+        """Handles key press events."""
+        super().handle_key_down(key)
+        action = self.KEY_ACTIONS.get(key)
+        if action is not None:
+            action(self)
 
     def cleanup(self):
         """Clean up resources before exiting."""
         print("Cleaning up...")
+        self._stop_event.set()
+        self._cmd_ready.set()
+        self._rc_thread.join()
+        self._battery_thread.join()
+        self._cmd_queue.clear()
         if self.is_flying and self.connected:
             print("Final landing command issued.")
             try:
@@ -353,7 +306,7 @@ class TelloController:
             except Exception as e:
                 print(f"Final landing failed: {e}")
         
-        pygame.quit()
+        super().cleanup()
         print("Controller stopped.")
 
 def main():
@@ -363,7 +316,11 @@ def main():
     parser = argparse.ArgumentParser(description='Tello Drone Controller')
     parser.add_argument('--mock', action='store_true', 
                        help='Use mock Tello (for testing without drone)')
+    parser.add_argument('--verbose', action='store_true',
+                       help='Log every key and RC command')
     args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format='%(message)s')
     
     try:
         controller = TelloController(use_mock=args.mock)
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Shared pygame window and input loop for the keyboard controller scripts
+(tello_controller_test.py and keyboard_test.py).
+"""
+import pygame
+import os
+import sys
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Speed of the drone
+S = 60
+# Control intervals
+FPS = 60  # Reduced for better performance
+# Window background; text is rendered onto it so every surface can be opaque
+BG_COLOR = (30, 30, 50)
+# Characters pre-rasterized into the glyph atlas for frequently changing numbers
+ATLAS_CHARS = "0123456789-%"
+# Velocity readout colors
+ACTIVE = (0, 255, 255)
+INACTIVE = (150, 150, 150)
+# Velocity readout labels, in the order of the velocity tuple
+VEL_LABELS = ("Forward/Back:", "Left/Right:", "Up/Down:", "Yaw:")
+# Keys shown in the "Pressed:" line (in display order) and their bit in pressed_mask
+PRESSED_KEY_LABELS = (
+    (pygame.K_a, "A"), (pygame.K_d, "D"), (pygame.K_DOWN, "DOWN"),
+    (pygame.K_ESCAPE, "ESCAPE"), (pygame.K_l, "L"), (pygame.K_LEFT, "LEFT"),
+    (pygame.K_RIGHT, "RIGHT"), (pygame.K_s, "S"), (pygame.K_t, "T"),
+    (pygame.K_UP, "UP"), (pygame.K_w, "W"),
+)
+KEY_BIT = {key: 1 << i for i, (key, _) in enumerate(PRESSED_KEY_LABELS)}
+# Movement keys: velocity attribute, direction and debug message on press
+MOVE_KEYS = {
+    pygame.K_w: ('for_back_velocity', 1, "Moving forward"),
+    pygame.K_s: ('for_back_velocity', -1, "Moving backward"),
+    pygame.K_a: ('left_right_velocity', -1, "Moving left"),
+    pygame.K_d: ('left_right_velocity', 1, "Moving right"),
+    pygame.K_UP: ('up_down_velocity', 1, "Moving up"),
+    pygame.K_DOWN: ('up_down_velocity', -1, "Moving down"),
+    pygame.K_LEFT: ('yaw_velocity', -1, "Rotating left"),
+    pygame.K_RIGHT: ('yaw_velocity', 1, "Rotating right"),
+}
+# Velocity attribute zeroed on release, and its debug message
+STOP_MESSAGES = {
+    'for_back_velocity': "Stopped forward/back movement",
+    'left_right_velocity': "Stopped left/right movement",
+    'up_down_velocity': "Stopped up/down movement",
+    'yaw_velocity': "Stopped rotation",
+}
+# Maximum number of rendered text surfaces kept in memory
+TEXT_CACHE_SIZE = 256
+
+
+class InputUI:
+    """
+    Pygame window that turns the movement keys into RC velocities.
+
+    Draws the title, instructions, velocity readout and pressed keys, and calls
+    on_rc(lr, fb, ud, yaw) once per frame. Subclasses add their own keys in
+    handle_key_down/handle_key_up and their own widgets in draw_widgets.
+    """
+    # Layout (subclasses override these for other window sizes)
+    TITLE_CENTER = (400, 50)
+    INSTRUCTIONS_POS = (50, 350)
+    INSTRUCTION_SPACING = 25
+    VEL_POS = (250, 200)
+    VEL_SPACING = 30
+    VEL_NUMBER_RIGHT = 400
+    PRESSED_POS = (50, 550)
+
+    # Fixed attribute layout: the velocities are read every frame
+    __slots__ = (
+        'screen', 'font_large', 'font_medium', 'font_small', 'on_rc', 'running',
+        'for_back_velocity', 'left_right_velocity', 'up_down_velocity', 'yaw_velocity',
+        'pressed_mask', 'input_stamp',
+        '_text_cache', '_bg', '_vel_label_surfaces', '_vel_number_surfaces',
+        '_pressed_surfaces', '_atlases', '_dirty', '_last_rects',
+    )
+
+    def __init__(self, size, caption, title, instructions, on_rc=None):
+        # Force Pygame to use specific video driver on macOS
+        if sys.platform == "darwin":  # macOS
+            os.environ['SDL_VIDEODRIVER'] = 'cocoa'
+
+        # Initialize Pygame
+        pygame.init()
+        pygame.mixer.quit()  # Disable audio to prevent issues
+
+        # Set up display with specific flags for macOS
+        # (HWSURFACE is ignored by SDL2; SCALED gives a renderer that can wait for vsync)
+        flags = pygame.DOUBLEBUF | pygame.SCALED
+        try:
+            self.screen = pygame.display.set_mode(size, flags, vsync=1)
+        except pygame.error:
+            # vsync is not available on every driver
+            self.screen = pygame.display.set_mode(size, flags)
+        pygame.display.set_caption(caption)
+
+        # Only these events reach the queue; mouse motion, focus etc. are dropped inside SDL
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP])
+
+        # Fill screen with a dark color initially
+        self.screen.fill(BG_COLOR)
+        pygame.display.flip()
+
+        # macOS specific: Force window to front (in-process via pyobjc, if installed)
+        if sys.platform == "darwin":
+            try:
+                from AppKit import NSApplication, NSApplicationActivationPolicyRegular
+                app = NSApplication.sharedApplication()
+                app.setActivationPolicy_(NSApplicationActivationPolicyRegular)
+                app.activateIgnoringOtherApps_(True)
+            except Exception:
+                pass  # pyobjc is optional; the window just keeps its default focus
+
+        # Initialize fonts for text display
+        self.font_large = pygame.font.Font(None, 36)
+        self.font_medium = pygame.font.Font(None, 24)
+        self.font_small = pygame.font.Font(None, 18)
+
+        # Rendered text surfaces keyed by (font, text, color)
+        self._text_cache = {}
+        # Glyph atlases keyed by (font, color), see add_atlas
+        self._atlases = {}
+        self._build_static_surfaces(title, instructions)
+
+        # Redraw only when the displayed state changes
+        self._dirty = True
+        # Regions updated in the previous frame (the whole screen for the first one)
+        self._last_rects = [self.screen.get_rect()]
+
+        # Called once per frame with the current velocities
+        self.on_rc = on_rc
+        self.running = True
+
+        # Velocities
+        self.for_back_velocity = 0
+        self.left_right_velocity = 0
+        self.up_down_velocity = 0
+        self.yaw_velocity = 0
+
+        # Keys currently pressed (for visual feedback), one KEY_BIT per key
+        self.pressed_mask = 0
+        # "Pressed: ..." line per mask (at most 2 ** len(KEY_BIT) entries)
+        self._pressed_surfaces = {}
+        # Time of the first key event in the current frame (None if there was none)
+        self.input_stamp = None
+
+    @property
+    def velocities(self):
+        """Current velocities in send_rc_control order (lr, fb, ud, yaw)."""
+        return (self.left_right_velocity, self.for_back_velocity,
+                self.up_down_velocity, self.yaw_velocity)
+
+    def _render(self, font, text, color):
+        """Render text through the cache so each string is rasterized only once."""
+        key = (id(font), text, color)
+        surface = self._text_cache.get(key)
+        if surface is None:
+            # Drop the oldest entry once the cache is full
+            if len(self._text_cache) >= TEXT_CACHE_SIZE:
+                del self._text_cache[next(iter(self._text_cache))]
+            # Opaque and in the screen format, so blits take SDL's fast path
+            surface = font.render(text, True, color, BG_COLOR).convert()
+            self._text_cache[key] = surface
+        return surface
+
+    def _build_static_surfaces(self, title, instructions):
+        """Pre-render the background (title and instructions) and the velocity readout parts once."""
+        self._bg = pygame.Surface(self.screen.get_size()).convert()
+        self._bg.fill(BG_COLOR)
+
+        # Title
+        title_surface = self._render(self.font_large, title, (255, 255, 255))
+        self._bg.blit(title_surface, title_surface.get_rect(center=self.TITLE_CENTER))
+
+        # Instructions (the first line is the heading)
+        x, start_y = self.INSTRUCTIONS_POS
+        for i, instruction in enumerate(instructions):
+            color = (255, 255, 255) if i == 0 else (200, 200, 200)
+            font = self.font_medium if i == 0 else self.font_small
+            self._bg.blit(self._render(font, instruction, color),
+                          (x, start_y + i * self.INSTRUCTION_SPACING))
+
+        # Velocity labels in both colors, and the number for each possible velocity
+        self._vel_label_surfaces = [
+            {color: self._render(self.font_medium, label, color) for color in (ACTIVE, INACTIVE)}
+            for label in VEL_LABELS
+        ]
+        self._vel_number_surfaces = {
+            v: self._render(self.font_medium, f"{v:4d}", ACTIVE if v else INACTIVE)
+            for v in (-S, 0, S)
+        }
+
+    def add_atlas(self, font, color):
+        """Rasterize ATLAS_CHARS side by side into one surface for blit_text."""
+        glyph_surfaces = [font.render(ch, True, color, BG_COLOR) for ch in ATLAS_CHARS]
+        atlas = pygame.Surface((sum(g.get_width() for g in glyph_surfaces), font.get_height())).convert()
+        glyphs = {}
+        x = 0
+        for ch, glyph_surface in zip(ATLAS_CHARS, glyph_surfaces):
+            atlas.blit(glyph_surface, (x, 0))
+            glyphs[ch] = (x, glyph_surface.get_width())
+            x += glyph_surface.get_width()
+        self._atlases[font, color] = (atlas, glyphs)
+
+    def text_width(self, text, font, color):
+        """Width of text drawn with blit_text."""
+        _, glyphs = self._atlases[font, color]
+        return sum(glyphs[ch][1] for ch in text)
+
+    def blit_text(self, text, pos, font, color):
+        """Draw text (ATLAS_CHARS only) from the glyph atlas; returns the covered rect."""
+        atlas, glyphs = self._atlases[font, color]
+        x, y = pos
+        height = atlas.get_height()
+        blit_list = []
+        for ch in text:
+            gx, gw = glyphs[ch]
+            blit_list.append((atlas, (x, y), (gx, 0, gw, height)))
+            x += gw
+        self.screen.blits(blit_list, doreturn=False)
+        return pygame.Rect(pos[0], y, x - pos[0], height)
+
+    def draw_ui(self):
+        """
+        Draw the user interface with current status and controls.
+
+        Returns the screen regions that need updating: the widgets drawn in
+        this frame plus those of the previous frame, so stale ones get cleared.
+        """
+        # Background with the title and instructions (clears the previous frame)
+        self.screen.blit(self._bg, (0, 0))
+        rects = self.draw_widgets()
+
+        dirty = rects + self._last_rects
+        self._last_rects = rects
+        return dirty
+
+    def draw_widgets(self):
+        """Draw the velocity readout and the pressed keys; returns the drawn rects."""
+        rects = []
+
+        # Current velocities
+        vel_x, vel_y = self.VEL_POS
+        vels = (self.for_back_velocity, self.left_right_velocity,
+                self.up_down_velocity, self.yaw_velocity)
+
+        for i, (label_surfaces, v) in enumerate(zip(self._vel_label_surfaces, vels)):
+            color = ACTIVE if v else INACTIVE
+            y = vel_y + i * self.VEL_SPACING
+            rects.append(self.screen.blit(label_surfaces[color], (vel_x, y)))
+            # Numbers are right-aligned so the column lines up
+            number_surface = self._vel_number_surfaces[v]
+            rects.append(self.screen.blit(number_surface,
+                                          number_surface.get_rect(topright=(self.VEL_NUMBER_RIGHT, y))))
+
+        # Currently pressed keys
+        pressed_rect = self.draw_pressed()
+        if pressed_rect is not None:
+            rects.append(pressed_rect)
+
+        return rects
+
+    def draw_pressed(self):
+        """Draw the "Pressed:" line for the tracked keys; returns its rect, or None if nothing is held."""
+        if not self.pressed_mask:
+            return None
+        pressed_surface = self._pressed_surfaces.get(self.pressed_mask)
+        if pressed_surface is None:
+            names = ', '.join(label for key, label in PRESSED_KEY_LABELS
+                              if self.pressed_mask & KEY_BIT[key])
+            pressed_surface = self.font_small.render(f"Pressed: {names}", True, (255, 255, 0),
+                                                     BG_COLOR).convert()
+            self._pressed_surfaces[self.pressed_mask] = pressed_surface
+        return self.screen.blit(pressed_surface, self.PRESSED_POS)
+
+    def run(self):
+        """Main loop: handle events, report velocities and redraw until stopped."""
+        clock = pygame.time.Clock()
+
+        while self.running:
+            self.input_stamp = None
+
+            # Handle Pygame events
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.running = False
+                elif event.type == pygame.KEYDOWN:
+                    self.input_stamp = self.input_stamp or pygame.time.get_ticks()
+                    self.handle_key_down(event.key)
+                elif event.type == pygame.KEYUP:
+                    self.input_stamp = self.input_stamp or pygame.time.get_ticks()
+                    self.handle_key_up(event.key)
+
+            if self.on_rc is not None:
+                self.on_rc(*self.velocities)
+
+            # Update display (only the changed regions, and only when something changed)
+            # (cleared before drawing so an update from another thread during the draw is not lost)
+            if self._dirty:
+                self._dirty = False
+                pygame.display.update(self.draw_ui())
+
+            # Presents are paced by vsync; this only caps the loop when nothing is drawn
+            clock.tick(FPS)
+
+        # Cleanup before exit
+        self.cleanup()
+
+    def handle_key_down(self, key):
+        """Handles key press events."""
+        self.pressed_mask |= KEY_BIT.get(key, 0)
+        self._dirty = True
+
+        # Movement controls
+        move = MOVE_KEYS.get(key)
+        if move is not None:
+            attr, direction, message = move
+            setattr(self, attr, direction * S)
+            logger.debug(message)
+
+    def handle_key_up(self, key):
+        """Handles key release events to stop movement."""
+        self.pressed_mask &= ~KEY_BIT.get(key, 0)
+        self._dirty = True
+
+        move = MOVE_KEYS.get(key)
+        if move is not None:
+            attr = move[0]
+            setattr(self, attr, 0)
+            logger.debug(STOP_MESSAGES[attr])
+
+    def cleanup(self):
+        """Close the window."""
+        pygame.quit()